@@ -0,0 +1,73 @@
+import re
+
+# JSON schema the model fills in for structured output; strict mode requires every field and no extras
+ACTION_ITEMS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "action_items": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "task": {"type": "string", "description": "What needs to be done, in one sentence."},
+                    "owner": {"type": ["string", "null"], "description": "Who is responsible, if stated."},
+                    "due_date": {"type": ["string", "null"], "description": "When it is due, as YYYY-MM-DD if a date is stated, otherwise as said."},
+                    "subtasks": {"type": "array", "items": {"type": "string"}},
+                },
+                "required": ["task", "owner", "due_date", "subtasks"],
+                "additionalProperties": False,
+            },
+        },
+    },
+    "required": ["action_items"],
+    "additionalProperties": False,
+}
+
+EXTRACTION_PROMPT = (
+    "Below is a list of action items produced from the transcript above. Return every action item in it as "
+    "structured data. Take each item's owner and due date from the list or, where it is silent, from the "
+    "transcript; use null when neither says. Put any steps belonging to an item in its subtasks.\n\n{action_items}"
+)
+
+# Prompt for each kind of draft offered in the Action Items grid
+DRAFT_PROMPTS = {
+    "email": "Draft an email for the following action item: {item}",
+    "slack": "Draft a Slack message for the following action item: {item}",
+    "memo": "Draft a memo for the following action item: {item}",
+}
+
+BULLET = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+")
+
+
+def describe_item(item):
+    """Render a structured action item as one line of text for a draft prompt."""
+    text = item["task"]
+    if item.get("owner"):
+        text += f" Owner: {item['owner']}."
+    if item.get("due_date"):
+        text += f" Due: {item['due_date']}."
+    if item.get("subtasks"):
+        text += " Subtasks: " + "; ".join(item["subtasks"]) + "."
+    return text
+
+
+def draft_prompt(kind, item):
+    """Return the prompt that drafts a message of the given kind for an action item."""
+    return DRAFT_PROMPTS[kind].format(item=describe_item(item))
+
+
+def parse_action_items(text):
+    """Parse free-form action items into the structured shape, for models without structured output.
+
+    Top-level lines become items and indented lines their subtasks.
+    """
+    items = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        content = BULLET.sub("", line).strip()
+        if line[:1].isspace() and items:
+            items[-1]["subtasks"].append(content)
+        elif content:
+            items.append({"task": content, "owner": None, "due_date": None, "subtasks": []})
+    return items
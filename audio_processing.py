@@ -0,0 +1,294 @@
+import os
+import re
+import subprocess
+import tempfile
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+
+from tracing import propagate, span
+
+# Target length of each transcription chunk, and how much neighbouring chunks overlap
+CHUNK_SECONDS = float(os.getenv("AUDIO_CHUNK_SECONDS", "600"))
+OVERLAP_SECONDS = float(os.getenv("AUDIO_CHUNK_OVERLAP_SECONDS", "5"))
+MAX_AUDIO_WORKERS = int(os.getenv("MAX_AUDIO_WORKERS", "4"))
+
+# Whisper rejects uploads above 25 MB; stay a little under it
+MAX_UPLOAD_BYTES = 24 * 1024 * 1024
+
+# Silence detection settings used to pick chunk boundaries
+SILENCE_NOISE_DB = -35
+SILENCE_MIN_SECONDS = 0.5
+SILENCE_SEARCH_SECONDS = 60
+
+# Words compared when removing text repeated across a chunk boundary
+OVERLAP_MATCH_WORDS = 30
+
+# Audio codecs copied out of a video as-is, and the container each is written to
+AUDIO_COPY_CONTAINERS = {"aac": ".m4a", "alac": ".m4a", "mp3": ".mp3"}
+
+Segment = namedtuple("Segment", ["start", "end", "text"])
+Chunk = namedtuple("Chunk", ["start", "end", "own_start", "own_end"])
+
+
+class WhisperBackend:
+    """Transcribe audio files with the OpenAI Whisper API through a ModelGateway."""
+
+    def __init__(self, gateway, model="whisper-1"):
+        self.gateway = gateway
+        self.model = model
+
+    def transcribe(self, audio_file):
+        """Return the timestamped segments of an open audio file."""
+        response = self.gateway.transcribe(
+            audio_file.read(), os.path.basename(audio_file.name), self.model, response_format="verbose_json"
+        )
+        return [Segment(s["start"], s["end"], s["text"].strip()) for s in response["segments"]]
+
+
+class StubBackend:
+    """Offline backend returning placeholder segments, for tests and benchmarks."""
+
+    model = "stub"
+
+    def __init__(self, latency=0.0, segment_seconds=5.0):
+        self.latency = latency
+        self.segment_seconds = segment_seconds
+
+    def transcribe(self, audio_file):
+        """Return one placeholder segment per segment_seconds of audio."""
+        duration = probe_duration(audio_file.name)
+        time.sleep(self.latency)
+        segments = []
+        position = 0.0
+        while position < duration:
+            end = min(position + self.segment_seconds, duration)
+            segments.append(Segment(position, end, f"Speech from {position:.1f}s to {end:.1f}s."))
+            position = end
+        return segments
+
+
+def probe_duration(path):
+    """Return the duration of a media file in seconds."""
+    output = subprocess.run(
+        ["ffprobe", "-v", "error", "-show_entries", "format=duration", "-of", "default=nw=1:nk=1", path],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return float(output.strip())
+
+
+def detect_silences(path, noise_db=SILENCE_NOISE_DB, min_seconds=SILENCE_MIN_SECONDS):
+    """Return (start, end) pairs of the silent stretches in an audio file."""
+    stderr = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-nostats", "-i", path, "-vn",
+         "-af", f"silencedetect=noise={noise_db}dB:d={min_seconds}", "-f", "null", "-"],
+        capture_output=True, text=True,
+    ).stderr
+    starts = [float(m) for m in re.findall(r"silence_start: (-?[\d.]+)", stderr)]
+    ends = [float(m) for m in re.findall(r"silence_end: ([\d.]+)", stderr)]
+    return list(zip(starts, ends))
+
+
+def plan_chunks(duration, silences, chunk_seconds=CHUNK_SECONDS, overlap_seconds=OVERLAP_SECONDS):
+    """Split a recording into overlapping chunks whose boundaries fall in silences.
+
+    Each chunk owns the span [own_start, own_end); start and end extend it by
+    the overlap so that words at a boundary are heard in full by one chunk.
+    """
+    search = min(SILENCE_SEARCH_SECONDS, chunk_seconds / 2)
+    midpoints = [(start + end) / 2 for start, end in silences]
+    boundaries = [0.0]
+    while duration - boundaries[-1] > chunk_seconds:
+        target = boundaries[-1] + chunk_seconds
+        candidates = [m for m in midpoints if target - search <= m <= target]
+        boundaries.append(max(candidates) if candidates else target)
+    boundaries.append(duration)
+    return [
+        Chunk(max(0.0, own_start - overlap_seconds), min(duration, own_end + overlap_seconds), own_start, own_end)
+        for own_start, own_end in zip(boundaries, boundaries[1:])
+    ]
+
+
+@contextmanager
+def temp_path(suffix):
+    """Yield the path of a new empty temporary file, removed on exit."""
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    os.close(fd)
+    try:
+        yield path
+    finally:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def disk_path(file):
+    """Return the path of a file object read from disk, or None for an in-memory upload."""
+    name = getattr(file, "name", None)
+    return name if isinstance(name, str) and os.path.isabs(name) and os.path.isfile(name) else None
+
+
+@contextmanager
+def spill_to_temp_file(data, suffix):
+    """Yield the path of a temporary copy of data, removed on exit."""
+    with temp_path(suffix) as path:
+        with open(path, "wb") as f:
+            f.write(data)
+        yield path
+
+
+@contextmanager
+def local_audio_path(audio_file, suffix=".mp3"):
+    """Yield a filesystem path for an audio file, spilling in-memory uploads to a temp file."""
+    path = disk_path(audio_file)
+    if path is not None:
+        yield path
+        return
+    name = getattr(audio_file, "name", None)
+    data = audio_file.getbuffer() if hasattr(audio_file, "getbuffer") else audio_file.read()
+    with spill_to_temp_file(data, os.path.splitext(name or "")[1] or suffix) as path:
+        yield path
+
+
+@contextmanager
+def extract_chunk(path, chunk):
+    """Yield a temporary compact mono MP3 holding one chunk of a recording."""
+    with temp_path(".mp3") as chunk_path:
+        subprocess.run(
+            ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y", "-ss", f"{chunk.start:.3f}",
+             "-t", f"{chunk.end - chunk.start:.3f}", "-i", path, "-vn", "-ac", "1", "-ar", "16000",
+             "-b:a", "64k", chunk_path],
+            check=True,
+        )
+        yield chunk_path
+
+
+def probe_audio_codec(source, data=None):
+    """Return the codec of the first audio stream, "" if there is none, or None if unreadable.
+
+    source is a path, or "pipe:0" with the media bytes passed as data.
+    """
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-select_streams", "a:0", "-show_entries", "stream=codec_name",
+         "-of", "default=nw=1:nk=1", source],
+        input=data, capture_output=True,
+    )
+    if result.returncode != 0:
+        return None
+    return result.stdout.decode().strip()
+
+
+def _extract_audio_track(source, output_path, codec, data=None):
+    codec_args = ["-c:a", "copy"] if codec in AUDIO_COPY_CONTAINERS else ["-c:a", "libmp3lame", "-q:a", "4"]
+    subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y", "-i", source, "-map", "0:a:0", "-vn",
+         *codec_args, output_path],
+        input=data, capture_output=True, check=True,
+    )
+
+
+@contextmanager
+def extract_audio(uploaded_file, suffix):
+    """Yield an open temporary file holding only the audio track of a video upload.
+
+    Files on disk are read by ffmpeg from their path. An in-memory upload's
+    buffer is piped straight into ffmpeg, and only containers whose index
+    sits after the media data (non-faststart MP4/MOV) are spilled to a
+    temporary file, since they need a seekable input. The video stream is
+    never decoded; AAC, ALAC and MP3 audio is copied without re-encoding.
+    Every temporary file is removed on exit.
+    """
+    path = disk_path(uploaded_file)
+    data = None if path is not None else uploaded_file.getbuffer()
+    with ExitStack() as stack:
+        if path is not None:
+            source, stdin_data = path, None
+            codec = probe_audio_codec(source)
+        else:
+            source, stdin_data = "pipe:0", data
+            codec = probe_audio_codec(source, data)
+            if codec is None:
+                source, stdin_data = stack.enter_context(spill_to_temp_file(data, suffix)), None
+                codec = probe_audio_codec(source)
+        if codec is None:
+            raise ValueError(f"The uploaded {suffix} file could not be read.")
+        if not codec:
+            raise ValueError(f"The uploaded {suffix} file does not contain an audio track.")
+
+        audio_path = stack.enter_context(temp_path(AUDIO_COPY_CONTAINERS.get(codec, ".mp3")))
+        try:
+            _extract_audio_track(source, audio_path, codec, stdin_data)
+        except subprocess.CalledProcessError:
+            if stdin_data is None:
+                raise
+            source = stack.enter_context(spill_to_temp_file(data, suffix))
+            _extract_audio_track(source, audio_path, codec)
+        yield stack.enter_context(open(audio_path, "rb"))
+
+
+def transcribe_chunk(path, chunk, backend):
+    """Transcribe one chunk, keeping only the segments it owns, on the recording's timeline."""
+    with extract_chunk(path, chunk) as chunk_path, open(chunk_path, "rb") as f:
+        segments = backend.transcribe(f)
+    owned = []
+    for segment in segments:
+        start, end = segment.start + chunk.start, segment.end + chunk.start
+        if chunk.own_start <= (start + end) / 2 < chunk.own_end:
+            owned.append(Segment(start, end, segment.text))
+    return owned
+
+
+def _drop_repeated_words(previous_text, text):
+    """Remove the leading words of text that repeat the tail of previous_text."""
+    previous_words = previous_text.split()[-OVERLAP_MATCH_WORDS:]
+    words = text.split()
+    normalize = lambda w: re.sub(r"\W", "", w.lower())
+    for size in range(min(len(previous_words), len(words)), 2, -1):
+        if [normalize(w) for w in previous_words[-size:]] == [normalize(w) for w in words[:size]]:
+            return " ".join(words[size:])
+    return text
+
+
+def stitch_segments(chunk_segments):
+    """Join per-chunk segment lists, dropping text duplicated across chunk boundaries."""
+    stitched = []
+    for segments in chunk_segments:
+        for i, segment in enumerate(segments):
+            if i == 0 and stitched:
+                segment = segment._replace(text=_drop_repeated_words(stitched[-1].text, segment.text))
+            if segment.text:
+                stitched.append(segment)
+    return stitched
+
+
+def transcribe_long_audio(audio_file, backend, max_workers=MAX_AUDIO_WORKERS):
+    """Transcribe an audio file of any length, returning timestamped segments.
+
+    Short files small enough for a single request are sent as-is; anything
+    else is split at silences into overlapping chunks transcribed concurrently.
+    """
+    with span("transcribe_long_audio", model=backend.model) as s, local_audio_path(audio_file) as path:
+        duration = probe_duration(path)
+        s.set(duration_seconds=duration, bytes=os.path.getsize(path), chunks=1)
+        if duration <= CHUNK_SECONDS and os.path.getsize(path) <= MAX_UPLOAD_BYTES:
+            with open(path, "rb") as f:
+                return backend.transcribe(f)
+        silences = detect_silences(path) if duration > CHUNK_SECONDS else []
+        chunks = plan_chunks(duration, silences)
+        s.set(chunks=len(chunks))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            chunk_segments = list(executor.map(propagate(lambda chunk: transcribe_chunk(path, chunk, backend)), chunks))
+    return stitch_segments(chunk_segments)
+
+
+def format_timestamp(seconds):
+    """Format seconds as HH:MM:SS."""
+    seconds = int(seconds)
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def format_segments(segments):
+    """Render timestamped segments as one transcript line per segment."""
+    return "\n".join(f"[{format_timestamp(segment.start)}] {segment.text}" for segment in segments)
@@ -0,0 +1,154 @@
+import math
+import os
+import random
+import subprocess
+import tempfile
+import wave
+from array import array
+from io import BytesIO
+
+WORDS = "alpha beta gamma delta roadmap budget launch customer review metric owner deadline risk".split()
+
+
+def sentence(rng, words=12):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def png_bytes(rng, size=(320, 240)):
+    """Return a PNG of random coloured blocks, so images are distinct for deduplication."""
+    from PIL import Image, ImageDraw
+
+    image = Image.new("RGB", size, "white")
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        x, y = rng.randrange(size[0]), rng.randrange(size[1])
+        draw.rectangle([x, y, x + rng.randrange(20, 120), y + rng.randrange(20, 90)], fill=tuple(rng.randrange(256) for _ in range(3)))
+    buffer = BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def make_pdf(path, pages, images_per_page=1, seed=0):
+    """Write an N-page PDF with text and distinct images on every page."""
+    import fitz
+
+    rng = random.Random(seed)
+    document = fitz.open()
+    for _ in range(pages):
+        page = document.new_page()
+        page.insert_textbox(fitz.Rect(50, 50, 550, 400), " ".join(sentence(rng) for _ in range(15)))
+        for i in range(images_per_page):
+            page.insert_image(fitz.Rect(50 + i * 10, 420, 350 + i * 10, 645), stream=png_bytes(rng))
+    document.save(path)
+    return path
+
+
+def make_pptx(path, slides, images_per_slide=1, seed=0):
+    """Write a deck with a title, body text and distinct images on every slide."""
+    from pptx import Presentation
+    from pptx.util import Inches
+
+    rng = random.Random(seed)
+    presentation = Presentation()
+    for _ in range(slides):
+        slide = presentation.slides.add_slide(presentation.slide_layouts[1])
+        slide.shapes.title.text = sentence(rng, 4)
+        slide.placeholders[1].text = "\n".join(sentence(rng) for _ in range(4))
+        for i in range(images_per_slide):
+            slide.shapes.add_picture(BytesIO(png_bytes(rng)), Inches(5 + i * 0.2), Inches(4), width=Inches(3))
+    presentation.save(path)
+    return path
+
+
+def make_xlsx(path, rows, columns=12, seed=0):
+    """Write a workbook with one large sheet of mixed numeric and text columns."""
+    import openpyxl
+
+    rng = random.Random(seed)
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet("Data")
+    sheet.append([f"column_{c}" for c in range(columns)])
+    for _ in range(rows):
+        sheet.append([rng.random() * 1000 if c % 2 else rng.choice(WORDS) for c in range(columns)])
+    workbook.save(path)
+    return path
+
+
+def make_docx(path, paragraphs, images=0, seed=0):
+    """Write a document of N paragraphs followed by distinct images."""
+    import docx
+
+    rng = random.Random(seed)
+    document = docx.Document()
+    for _ in range(paragraphs):
+        document.add_paragraph(" ".join(sentence(rng) for _ in range(5)))
+    for _ in range(images):
+        document.add_picture(BytesIO(png_bytes(rng)))
+    document.save(path)
+    return path
+
+
+def write_wave(path, seconds, rate=16000):
+    """Write a mono WAV of eight seconds of tone then two of silence, repeated, so the chunker finds boundaries."""
+    period = array("h", (int(12000 * math.sin(2 * math.pi * 440 * i / rate)) if i < 8 * rate else 0 for i in range(10 * rate)))
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(rate)
+        full_periods, remainder = divmod(seconds, 10)
+        for _ in range(int(full_periods)):
+            f.writeframes(period.tobytes())
+        f.writeframes(period[:int(remainder * rate)].tobytes())
+    return path
+
+
+def make_audio(path, seconds):
+    """Write an MP3 of alternating tone and silence."""
+    with tempfile.TemporaryDirectory() as directory:
+        wave_path = write_wave(os.path.join(directory, "audio.wav"), seconds)
+        subprocess.run(
+            ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y", "-i", wave_path, "-ac", "1", "-b:a", "64k", path],
+            check=True,
+        )
+    return path
+
+
+def make_video(path, seconds):
+    """Write a small H.264/AAC MP4 with the same audio pattern as make_audio."""
+    with tempfile.TemporaryDirectory() as directory:
+        wave_path = write_wave(os.path.join(directory, "audio.wav"), seconds)
+        subprocess.run(
+            ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+             "-f", "lavfi", "-i", f"testsrc=size=640x360:rate=15:duration={seconds}", "-i", wave_path,
+             "-c:v", "libx264", "-preset", "ultrafast", "-c:a", "aac", "-shortest", path],
+            check=True,
+        )
+    return path
+
+
+def make_transcript(words, seed=0):
+    """Return a synthetic transcript of roughly the given number of words."""
+    rng = random.Random(seed)
+    lines = []
+    count = 0
+    while count < words:
+        seconds = int(count / 2.5)
+        lines.append(f"[{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}] {sentence(rng, 15)}")
+        count += 15
+    return "\n".join(lines)
+
+
+def build_fixtures(directory, scale=1.0, names=None):
+    """Create the named fixtures (default: all) in directory, returning {name: (path, units)}."""
+    os.makedirs(directory, exist_ok=True)
+    pages, slides, rows, paragraphs, seconds = int(50 * scale), int(40 * scale), int(50000 * scale), int(500 * scale), int(1800 * scale)
+    video_seconds = min(seconds, 300)
+    builders = {
+        "pdf": lambda: (make_pdf(os.path.join(directory, "deck.pdf"), pages), pages),
+        "pptx": lambda: (make_pptx(os.path.join(directory, "deck.pptx"), slides), slides),
+        "xlsx": lambda: (make_xlsx(os.path.join(directory, "table.xlsx"), rows), rows),
+        "docx": lambda: (make_docx(os.path.join(directory, "notes.docx"), paragraphs, images=5), paragraphs),
+        "audio": lambda: (make_audio(os.path.join(directory, "meeting.mp3"), seconds), seconds),
+        "video": lambda: (make_video(os.path.join(directory, "recording.mp4"), video_seconds), video_seconds),
+    }
+    return {name: build() for name, build in builders.items() if names is None or name in names}
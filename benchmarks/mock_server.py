@@ -0,0 +1,87 @@
+import asyncio
+import json
+import random
+from collections import Counter
+
+import httpx
+
+
+def _sse(data):
+    return f"data: {json.dumps(data)}\n\n".encode()
+
+
+class MockOpenAITransport(httpx.AsyncBaseTransport):
+    """Local stand-in for the chat completion and Whisper endpoints, with configurable latency.
+
+    Plug it into the pipeline with configure_gateway(transport=MockOpenAITransport(...)).
+    Chat requests wait latency seconds, then produce completion_tokens words
+    token_interval seconds apart, streamed as SSE when requested.
+    Transcriptions wait transcription_latency seconds and return one segment
+    per segment_seconds of audio, estimated from the upload size at
+    audio_bitrate. A rate_limit_ratio share of requests is answered with 429.
+    """
+
+    def __init__(self, latency=0.3, token_interval=0.005, completion_tokens=200, transcription_latency=1.0,
+                 audio_bitrate=64000, segment_seconds=5.0, rate_limit_ratio=0.0, seed=None):
+        self.latency = latency
+        self.token_interval = token_interval
+        self.completion_tokens = completion_tokens
+        self.transcription_latency = transcription_latency
+        self.audio_bitrate = audio_bitrate
+        self.segment_seconds = segment_seconds
+        self.rate_limit_ratio = rate_limit_ratio
+        self.random = random.Random(seed)
+        self.calls = Counter()
+
+    async def handle_async_request(self, request):
+        await request.aread()
+        path = request.url.path
+        if self.rate_limit_ratio and self.random.random() < self.rate_limit_ratio:
+            self.calls["rate_limited"] += 1
+            return httpx.Response(429, headers={"retry-after-ms": "200"}, json={"error": {"message": "Rate limit reached (mock)"}})
+        if path.endswith("/chat/completions"):
+            return await self._chat(json.loads(request.content))
+        if path.endswith("/audio/transcriptions"):
+            return await self._transcription(len(request.content))
+        return httpx.Response(404, json={"error": {"message": f"No mock for {path}"}})
+
+    async def _chat(self, payload):
+        self.calls["chat"] += 1
+        words = [f"word{i}" for i in range(self.completion_tokens)]
+        prompt_tokens = len(json.dumps(payload.get("messages", []))) // 4
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": prompt_tokens + self.completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": 0},
+        }
+        await asyncio.sleep(self.latency)
+
+        if not payload.get("stream"):
+            await asyncio.sleep(self.token_interval * self.completion_tokens)
+            return httpx.Response(200, json={
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": " ".join(words)}, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+
+        async def events():
+            for word in words:
+                await asyncio.sleep(self.token_interval)
+                yield _sse({"choices": [{"index": 0, "delta": {"content": word + " "}}]})
+            if (payload.get("stream_options") or {}).get("include_usage"):
+                yield _sse({"choices": [], "usage": usage})
+            yield b"data: [DONE]\n\n"
+
+        return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=events())
+
+    async def _transcription(self, size):
+        self.calls["transcription"] += 1
+        await asyncio.sleep(self.transcription_latency)
+        duration = size * 8 / self.audio_bitrate
+        segments = []
+        position = 0.0
+        while position < duration:
+            end = min(position + self.segment_seconds, duration)
+            segments.append({"start": position, "end": end, "text": f" Speech from {position:.1f}s to {end:.1f}s."})
+            position = end
+        return httpx.Response(200, json={"text": "".join(s["text"] for s in segments), "duration": duration, "segments": segments})
@@ -0,0 +1,130 @@
+import argparse
+import json
+import multiprocessing
+import os
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import fixtures
+from pre_canned_prompts_file import pre_canned_prompts
+
+# Stage name -> (fixture it reads, unit its throughput is measured in)
+STAGES = {
+    "read_pdf": ("pdf", "pages"),
+    "read_pptx": ("pptx", "slides"),
+    "read_excel": ("xlsx", "rows"),
+    "read_docx": ("docx", "paragraphs"),
+    "extract_audio": ("video", "media s"),
+    "transcribe_audio": ("audio", "audio s"),
+    "generate_sections": (None, "sections"),
+}
+
+TRANSCRIPT_WORDS = 20000
+
+
+def stage_action(stage, path):
+    """Return a no-argument callable that runs one iteration of a stage."""
+    import pipeline
+    from audio_processing import extract_audio
+
+    if stage == "extract_audio":
+        def run():
+            with pipeline.LocalFile(path) as file, extract_audio(file, ".mp4"):
+                pass
+        return run
+    if stage == "generate_sections":
+        transcript = fixtures.make_transcript(TRANSCRIPT_WORDS)
+        prompts = pipeline.summary_prompts("meeting_summary")
+        return lambda: pipeline.generate_sections(transcript, prompts)
+    reader = getattr(pipeline, stage)
+
+    def run():
+        with pipeline.LocalFile(path) as file:
+            return reader(file)
+    return run
+
+
+def run_stage(stage, path, iterations, latency, cache_dir):
+    """Run a stage in this (fresh) process against the mock model server and return its samples and peak RSS.
+
+    peak_rss_mb is this process's; children_peak_rss_mb is the largest of its
+    child processes, i.e. the offload pool's workers and ffmpeg.
+    """
+    # Caches are pointed at an empty directory with no budget so every iteration does the full work
+    os.environ["TRANSCRIPTION_CACHE_DIR"] = os.path.join(cache_dir, "transcriptions")
+    os.environ["RESPONSE_CACHE_DIR"] = os.path.join(cache_dir, "responses")
+    os.environ["TRANSCRIPTION_CACHE_MAX_BYTES"] = "0"
+    os.environ["RESPONSE_CACHE_MAX_BYTES"] = "0"
+
+    import pipeline
+    from mock_server import MockOpenAITransport
+
+    transport = MockOpenAITransport(latency=latency, transcription_latency=latency * 3)
+    pipeline.configure_gateway(api_key="benchmark", transport=transport)
+    action = stage_action(stage, path)
+
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        action()
+        samples.append(time.perf_counter() - started)
+    # Children only count toward RUSAGE_CHILDREN once they have exited and been waited for
+    from offload import offload_pool
+
+    offload_pool.shutdown()
+    return {
+        "samples": samples,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "children_peak_rss_mb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024,
+        "model_calls": dict(transport.calls),
+    }
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the ingestion and generation stages against a local mock model server.")
+    parser.add_argument("stages", nargs="*", default=list(STAGES), help=f"stages to run (default: all of {', '.join(STAGES)})")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier for fixture sizes")
+    parser.add_argument("--latency", type=float, default=0.3, help="mock model latency before the first token, in seconds")
+    parser.add_argument("--fixtures-dir", help="write fixtures here and keep them, instead of a temporary directory")
+    parser.add_argument("--json", help="also write the results to this file, for tracking across releases")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        fixture_dir = args.fixtures_dir or os.path.join(temp_dir, "fixtures")
+        print(f"Building fixtures in {fixture_dir} ...", file=sys.stderr)
+        built = fixtures.build_fixtures(fixture_dir, args.scale, {STAGES[stage][0] for stage in args.stages} - {None})
+
+        results = {}
+        print(f"{'stage':<20}{'units/iter':>12}{'throughput':>22}{'p50':>10}{'p95':>10}{'peak RSS':>12}{'workers':>12}")
+        for stage in args.stages:
+            fixture, unit = STAGES[stage]
+            path, units = built[fixture] if fixture else (None, len(pre_canned_prompts["meeting_summary"]))
+            # A fresh spawned process per stage, so peak RSS belongs to that stage alone
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                result = executor.submit(run_stage, stage, path, args.iterations, args.latency, os.path.join(temp_dir, stage)).result()
+            samples = result["samples"]
+            p50, p95 = statistics.median(samples), percentile(samples, 0.95)
+            result.update(unit=unit, units=units, p50=p50, p95=p95, throughput=units / p50 if p50 else 0.0)
+            results[stage] = result
+            print(f"{stage:<20}{units:>12}{result['throughput']:>13.1f} {unit + '/s':<8}{p50:>9.2f}s{p95:>9.2f}s{result['peak_rss_mb']:>9.0f} MB{result['children_peak_rss_mb']:>9.0f} MB")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"timestamp": time.time(), "args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
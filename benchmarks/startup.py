@@ -0,0 +1,63 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules a cold start should not load until a matching file type or panel is used
+HEAVY_MODULES = ["httpx", "PIL", "fitz", "docx", "pptx", "openpyxl", "pandas", "tiktoken", "st_aggrid", "streamlit_quill"]
+
+CHECK_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "loaded": sorted(m for m in {heavy!r} if m in sys.modules)}}))
+"""
+
+
+def measure_import(module, repeat):
+    """Import a module in fresh interpreters, returning import times and the heavy modules it loaded."""
+    samples = []
+    loaded = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, "-c", CHECK_SCRIPT.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout
+        wall = time.perf_counter() - started
+        result = json.loads(output.strip().splitlines()[-1])
+        samples.append((result["seconds"], wall))
+        loaded = result["loaded"]
+    return samples, loaded
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold-start import time of the app and the pipeline.")
+    parser.add_argument("modules", nargs="*", default=["pipeline", "streamlit_meeting_app"])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'module':<24}{'import p50':>12}{'import p95':>12}{'process p50':>13}  heavy modules loaded")
+    for module in args.modules:
+        samples, loaded = measure_import(module, args.repeat)
+        imports = [s[0] for s in samples]
+        walls = [s[1] for s in samples]
+        print(
+            f"{module:<24}{statistics.median(imports) * 1000:>10.0f}ms{percentile(imports, 0.95) * 1000:>10.0f}ms"
+            f"{statistics.median(walls) * 1000:>11.0f}ms  {', '.join(loaded) or '-'}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+import hashlib
+import os
+import threading
+from io import BytesIO
+
+# Images whose shorter side is below this many pixels are treated as decorative
+MIN_IMAGE_SIDE = int(os.getenv("MIN_IMAGE_SIDE", "48"))
+
+# Perceptual hashes this many bits apart or fewer count as the same picture, provided the aspect
+# ratios also agree within this fraction; mostly blank images (text, charts, banners) hash alike
+MAX_HASH_DISTANCE = 5
+MAX_ASPECT_DIFFERENCE = 0.05
+
+# Remembered for images too small to describe, so repeats are not decoded again
+SKIPPED = object()
+
+# Images of one document queued for description at once; queue() blocks beyond this, so a reader
+# never holds more than this many images' encoded bytes, however many pages it has read ahead
+MAX_PENDING_IMAGES = int(os.getenv("MAX_PENDING_IMAGES", "20"))
+
+
+def difference_hash(image, size=8):
+    """Return a 64-bit perceptual difference hash of a PIL image."""
+    from PIL import Image
+
+    gray = image.convert("L").resize((size + 1, size), Image.LANCZOS)
+    pixels = list(gray.getdata())
+    bits = 0
+    for row in range(size):
+        for col in range(size):
+            offset = row * (size + 1) + col
+            bits = bits << 1 | (pixels[offset] > pixels[offset + 1])
+    return bits
+
+
+def image_fingerprint(data):
+    """Decode encoded image bytes, returning ((width, height), difference hash)."""
+    from PIL import Image
+
+    with Image.open(BytesIO(data)) as image:
+        return image.size, difference_hash(image)
+
+
+def shared_image_fingerprint(name, size):
+    """image_fingerprint for image bytes a worker process reads from shared memory."""
+    from offload import attach
+
+    with attach(name, size) as data:
+        return image_fingerprint(data)
+
+
+class ImageDeduplicator:
+    """Describe each distinct image in a document once and reuse the result for repeats.
+
+    Images are matched by PDF xref, then by an exact hash of their bytes, then
+    by perceptual hash and aspect ratio, so a logo re-encoded on every slide
+    is still caught. Images too small to describe are remembered the same
+    way, so a repeated bullet or icon is only decoded once. Images are handled as encoded bytes; fingerprint(data) returns their size
+    and perceptual hash and may decode them in another process. At most
+    max_pending images are submitted and not yet described at any time.
+    """
+
+    def __init__(self, submit, fingerprint=image_fingerprint, min_side=MIN_IMAGE_SIDE, max_distance=MAX_HASH_DISTANCE,
+                 max_pending=MAX_PENDING_IMAGES):
+        self.submit = submit
+        self.fingerprint = fingerprint
+        self.min_side = min_side
+        self.max_distance = max_distance
+        self.unique = 0
+        self.duplicates = 0
+        self.skipped = 0
+        self._by_xref = {}
+        self._by_digest = {}
+        self._by_hash = []
+        self._lock = threading.Lock()
+        self._pending = threading.BoundedSemaphore(max_pending)
+
+    def _remember(self, future, xref, digest):
+        if xref is not None:
+            self._by_xref[xref] = future
+        if digest is not None:
+            self._by_digest[digest] = future
+
+    def _known(self, xref, digest):
+        if xref is not None and xref in self._by_xref:
+            return self._by_xref[xref]
+        return self._by_digest.get(digest)
+
+    def _similar(self, size, image_hash):
+        width, height = size
+        for known_size, known_hash, future in self._by_hash:
+            known_width, known_height = known_size
+            aspect_difference = abs(width * known_height - known_width * height) / max(width * known_height, known_width * height)
+            if bin(known_hash ^ image_hash).count("1") <= self.max_distance and aspect_difference <= MAX_ASPECT_DIFFERENCE:
+                return future
+        return None
+
+    def queue(self, data, xref=None):
+        """Return a Future for the description of encoded image bytes, or None if the image is too small to describe.
+
+        Blocks while max_pending earlier images are still being described.
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            future = self._known(xref, digest)
+            if future is SKIPPED:
+                self.skipped += 1
+                self._remember(SKIPPED, xref, digest)
+                return None
+            if future is not None:
+                self.duplicates += 1
+                self._remember(future, xref, digest)
+                return future
+
+        size, image_hash = self.fingerprint(data)
+        if min(size) < self.min_side:
+            with self._lock:
+                self.skipped += 1
+                self._remember(SKIPPED, xref, digest)
+            return None
+
+        with self._lock:
+            future = self._similar(size, image_hash)
+            if future is not None:
+                self.duplicates += 1
+                self._remember(future, xref, digest)
+                return future
+
+        self._pending.acquire()
+        try:
+            future = self.submit(data)
+        except BaseException:
+            self._pending.release()
+            raise
+        future.add_done_callback(lambda _: self._pending.release())
+        with self._lock:
+            self.unique += 1
+            self._by_hash.append((size, image_hash, future))
+            self._remember(future, xref, digest)
+        return future
@@ -0,0 +1,21 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from tracing import propagate
+
+
+class ImageDescriptionScheduler:
+    """Shared, long-lived pool that describes images at a bounded concurrency.
+
+    Every reader submits its images here instead of building its own pool, so
+    images from all pages, slides, sheets and files share one queue. Retries
+    and rate-limit backoff are handled by the model gateway underneath.
+    Descriptions are traced under the span that submitted them.
+    """
+
+    def __init__(self, describe, max_workers=10):
+        self.describe = describe
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image-describer")
+
+    def submit(self, image):
+        """Queue an image, returning a Future for its description."""
+        return self._executor.submit(propagate(self.describe), image)
@@ -0,0 +1,154 @@
+import contextvars
+import itertools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+
+# Worker processes shared by every session for CPU-bound parsing and decoding
+MAX_OFFLOAD_PROCESSES = int(os.getenv("MAX_OFFLOAD_PROCESSES", str(min(4, os.cpu_count() or 1))))
+
+_session = contextvars.ContextVar("offload_session", default=None)
+_job_ids = itertools.count(1)
+
+
+class Job:
+    """One unit of work running in the offload pool on behalf of a session."""
+
+    def __init__(self, session_id, name, future):
+        self.id = next(_job_ids)
+        self.session_id = session_id
+        self.name = name
+        self.future = future
+        self.cancelled = False
+
+    @property
+    def status(self):
+        if self.cancelled or self.future.cancelled():
+            return "cancelled"
+        if self.future.running():
+            return "running"
+        return "done" if self.future.done() else "queued"
+
+    def cancel(self):
+        """Cancel the job; a job already running finishes, but its result is discarded."""
+        self.cancelled = True
+        self.future.cancel()
+
+    def result(self, timeout=None):
+        """Wait for and return the job's result, raising CancelledError if it was cancelled."""
+        result = self.future.result(timeout)
+        if self.cancelled:
+            raise CancelledError(f"offloaded job {self.name} was cancelled")
+        return result
+
+
+class OffloadPool:
+    """Long-lived worker processes for CPU-bound stages, so they never hold the server's GIL.
+
+    Jobs belong to the session that submitted them (see session()), so a
+    session's outstanding work can be listed and cancelled together, e.g.
+    when a Streamlit run is interrupted. Processes are started with spawn on
+    first use, since the app runs inside a multithreaded server.
+    """
+
+    def __init__(self, max_workers=MAX_OFFLOAD_PROCESSES):
+        self.max_workers = max_workers
+        self._executor = None
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.max_workers >= 1
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def submit(self, function, *args, session_id=None):
+        """Run function(*args) in a worker process, returning its Job.
+
+        session_id defaults to the session active in the calling context.
+        """
+        session_id = session_id if session_id is not None else _session.get()
+        job = Job(session_id, function.__name__, self._get_executor().submit(function, *args))
+        with self._lock:
+            self._jobs.setdefault(session_id, {})[job.id] = job
+        job.future.add_done_callback(lambda _: self._forget(job))
+        return job
+
+    def run(self, function, *args):
+        """Run function(*args) in a worker process and wait for its result."""
+        return self.submit(function, *args).result()
+
+    def _forget(self, job):
+        with self._lock:
+            jobs = self._jobs.get(job.session_id, {})
+            jobs.pop(job.id, None)
+            if not jobs:
+                self._jobs.pop(job.session_id, None)
+
+    def jobs(self, session_id):
+        """Return a session's queued and running jobs."""
+        with self._lock:
+            return list(self._jobs.get(session_id, {}).values())
+
+    def cancel(self, session_id):
+        """Cancel every outstanding job of a session, returning how many there were."""
+        jobs = self.jobs(session_id)
+        for job in jobs:
+            job.cancel()
+        return len(jobs)
+
+    def shutdown(self):
+        """Stop the worker processes, cancelling queued jobs."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+@contextmanager
+def session(session_id):
+    """Attribute jobs offloaded in this context, including from propagated pool threads, to session_id."""
+    token = _session.set(session_id)
+    try:
+        yield
+    finally:
+        _session.reset(token)
+
+
+@contextmanager
+def shared_bytes(data):
+    """Copy data once into shared memory, yielding (name, size) for a worker to attach() to."""
+    block = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+    try:
+        block.buf[:len(data)] = data
+        yield block.name, len(data)
+    finally:
+        block.close()
+        block.unlink()
+
+
+@contextmanager
+def attach(name, size):
+    """In a worker, yield a read-only view of a shared_bytes() block without copying it."""
+    # Spawned workers share the parent's resource tracker, so attaching here adds no second owner
+    block = shared_memory.SharedMemory(name=name)
+    window = block.buf[:size]
+    view = window.toreadonly()
+    try:
+        yield view
+    finally:
+        view.release()
+        window.release()
+        block.close()
+
+
+# One pool for the whole server process
+offload_pool = OffloadPool()
@@ -0,0 +1,303 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+
+from tracing import span
+
+DEFAULT_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+
+# Statuses that are retried: timeouts, conflicts, rate limiting and transient server errors
+RETRYABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+# Requests and tokens per minute allowed for each model; None means unlimited
+DEFAULT_BUDGETS = {
+    "gpt-4o-mini": (5000, 2_000_000),
+    "gpt-4o": (5000, 800_000),
+    "whisper-1": (500, None),
+}
+DEFAULT_BUDGET = (500, 200_000)
+
+
+class GatewayError(Exception):
+    """A model call rejected by the API, or still failing after every retry."""
+
+    def __init__(self, status_code, message, retry_after=None):
+        super().__init__(f"OpenAI API error {status_code}: {message}")
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self):
+        return self.status_code in RETRYABLE_STATUSES
+
+
+def _retry_after(headers):
+    """Return the server's requested retry delay in seconds, if it sent one."""
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        try:
+            return float(headers[name]) * scale
+        except (KeyError, TypeError, ValueError):
+            continue
+    return None
+
+
+# Vision tokens charged per image part: low detail is a flat cost, otherwise assume the largest tiling
+IMAGE_PART_TOKENS = {"low": 85, "high": 1105, "auto": 1105}
+
+
+def estimate_tokens(payload):
+    """Roughly estimate the tokens a chat request will consume, for budgeting.
+
+    Text is counted by length; images are charged a fixed vision cost rather
+    than the length of their base64 data.
+    """
+    tokens = 0
+    for message in payload.get("messages", []):
+        content = message.get("content") or ""
+        parts = [{"type": "text", "text": content}] if isinstance(content, str) else content
+        for part in parts:
+            if part.get("type") == "image_url":
+                tokens += IMAGE_PART_TOKENS.get(part["image_url"].get("detail", "auto"), IMAGE_PART_TOKENS["auto"])
+            else:
+                tokens += len(part.get("text") or "") // 4
+    return tokens + payload.get("max_tokens", 1000)
+
+
+class RateBudget:
+    """Token buckets limiting one model's requests and tokens per minute.
+
+    Only used from the gateway's event loop.
+    """
+
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.capacity = {"requests": requests_per_minute, "tokens": tokens_per_minute}
+        self.available = {kind: capacity or 0 for kind, capacity in self.capacity.items()}
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now):
+        elapsed = now - self.updated
+        self.updated = now
+        for kind, capacity in self.capacity.items():
+            if capacity is not None:
+                self.available[kind] = min(capacity, self.available[kind] + capacity * elapsed / 60)
+
+    async def acquire(self, tokens):
+        """Wait until the budget allows one more request costing tokens, then spend it."""
+        while True:
+            now = time.monotonic()
+            self._refill(now)
+            needs = {"requests": 1, "tokens": tokens}
+            wait = self.paused_until - now
+            for kind, amount in needs.items():
+                capacity = self.capacity[kind]
+                if capacity is not None:
+                    amount = min(amount, capacity)
+                    wait = max(wait, (amount - self.available[kind]) * 60 / capacity)
+            if wait <= 0:
+                for kind, amount in needs.items():
+                    if self.capacity[kind] is not None:
+                        self.available[kind] -= min(amount, self.capacity[kind])
+                return
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds):
+        """Hold back every request for this model, e.g. after a 429."""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class ModelGateway:
+    """Single async gateway for every OpenAI call the app makes.
+
+    All requests share one pooled HTTP/1.1 connection pool and run on a
+    dedicated event loop thread; thread-based callers use the blocking
+    wrappers (chat, stream_chat, transcribe). Each model has a request and
+    token budget, 429 and 5xx responses are retried with jittered exponential
+    backoff (a 429 also pauses the whole model), and identical non-streaming
+    requests already in flight are coalesced into one. Pass an httpx transport
+    (e.g. httpx.MockTransport) to drive the gateway against a fake server.
+    """
+
+    def __init__(self, api_key=None, base_url=DEFAULT_BASE_URL, transport=None, budgets=None,
+                 max_connections=64, max_retries=6, base_delay=0.5, max_delay=60.0, timeout=600.0):
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.base_url = base_url
+        self.transport = transport
+        self.budgets = dict(DEFAULT_BUDGETS, **(budgets or {}))
+        self.max_connections = max_connections
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout
+        self._budgets = {}
+        self._inflight = {}
+        self._closed = False
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="model-gateway", daemon=True)
+        self._thread.start()
+        self._client = self.run(self._create_client())
+
+    async def _create_client(self):
+        import httpx
+
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+            transport=self.transport,
+        )
+
+    def run(self, coroutine):
+        """Run a coroutine on the gateway's event loop from any thread and return its result."""
+        if self._closed:
+            coroutine.close()
+            raise RuntimeError("the model gateway is closed")
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def close(self):
+        """Close pooled connections and stop the event loop; later calls raise RuntimeError instead of hanging."""
+        self.run(self._client.aclose())
+        self._closed = True
+        self._loop.call_soon_threadsafe(self._loop.stop)
+
+    def budget(self, model):
+        """Return the rate budget for a model."""
+        if model not in self._budgets:
+            self._budgets[model] = RateBudget(*self.budgets.get(model, DEFAULT_BUDGET))
+        return self._budgets[model]
+
+    def _backoff(self, attempt):
+        return min(self.base_delay * 2 ** attempt, self.max_delay) * random.uniform(0.5, 1.0)
+
+    async def _raise_for_status(self, response):
+        if response.status_code < 400:
+            return
+        await response.aread()
+        try:
+            message = response.json()["error"]["message"]
+        except (ValueError, KeyError, TypeError):
+            message = response.text[:500]
+        raise GatewayError(response.status_code, message, _retry_after(response.headers))
+
+    async def _send(self, model, tokens, send):
+        """Await send() under the model's budget, retrying transient failures with jittered backoff."""
+        import httpx
+
+        budget = self.budget(model)
+        attempt = 0
+        while True:
+            await budget.acquire(tokens)
+            try:
+                return await send()
+            except GatewayError as e:
+                if not e.retryable or attempt >= self.max_retries:
+                    raise
+                delay = min(e.retry_after, self.max_delay) if e.retry_after is not None else self._backoff(attempt)
+                if e.status_code == 429:
+                    budget.pause(delay)
+            except httpx.TransportError:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def _coalesced(self, key, factory):
+        """Share one in-flight call among every caller making an identical request."""
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(factory())
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def _post_json(self, path, **kwargs):
+        response = await self._client.post(path, **kwargs)
+        await self._raise_for_status(response)
+        return response.json()
+
+    async def achat(self, payload):
+        """Create a chat completion and return the response JSON."""
+        key = "chat:" + hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+        return await self._coalesced(key, lambda: self._send(
+            payload["model"], estimate_tokens(payload), lambda: self._post_json("/chat/completions", json=payload)
+        ))
+
+    async def astream_chat(self, payload, on_delta):
+        """Stream a chat completion, calling on_delta(text) per piece; returns (text, usage).
+
+        on_delta runs on the gateway's event loop thread, so it should only
+        hand the text off (e.g. to a queue). A failed request is retried only
+        if no text has been delivered yet.
+        """
+        payload = dict(payload, stream=True)
+        pieces = []
+        usage = None
+
+        async def send():
+            nonlocal usage
+            async with self._client.stream("POST", "/chat/completions", json=payload) as response:
+                await self._raise_for_status(response)
+                async for line in response.aiter_lines():
+                    if not line.startswith("data: "):
+                        continue
+                    data = line[len("data: "):]
+                    if data == "[DONE]":
+                        break
+                    chunk = json.loads(data)
+                    usage = chunk.get("usage") or usage
+                    delta = chunk["choices"][0]["delta"].get("content") if chunk.get("choices") else None
+                    if delta:
+                        pieces.append(delta)
+                        on_delta(delta)
+
+        async def send_once():
+            if pieces:
+                raise GatewayError(0, "stream interrupted after output was delivered")
+            return await send()
+
+        await self._send(payload["model"], estimate_tokens(payload), send_once)
+        return "".join(pieces), usage
+
+    async def atranscribe(self, data, filename, model, response_format="json"):
+        """Transcribe audio bytes and return the response JSON."""
+        key = f"transcribe:{model}:{response_format}:" + hashlib.sha256(data).hexdigest()
+        return await self._coalesced(key, lambda: self._send(model, 0, lambda: self._post_json(
+            "/audio/transcriptions",
+            files={"file": (filename, data)},
+            data={"model": model, "response_format": response_format},
+        )))
+
+    def chat(self, payload):
+        """Blocking wrapper around achat."""
+        with span("model.chat", model=payload["model"]) as s:
+            response = self.run(self.achat(payload))
+            record_usage(s, response.get("usage"))
+            return response
+
+    def stream_chat(self, payload, on_delta):
+        """Blocking wrapper around astream_chat."""
+        with span("model.chat", model=payload["model"], streamed=True) as s:
+            text, usage = self.run(self.astream_chat(payload, on_delta))
+            record_usage(s, usage)
+            return text, usage
+
+    def transcribe(self, data, filename, model, response_format="json"):
+        """Blocking wrapper around atranscribe."""
+        with span("model.transcribe", model=model, bytes=len(data)):
+            return self.run(self.atranscribe(data, filename, model, response_format))
+
+
+def record_usage(s, usage):
+    """Add a chat completion's token usage to its span."""
+    if usage:
+        s.set(
+            tokens_in=usage.get("prompt_tokens") or 0,
+            tokens_out=usage.get("completion_tokens") or 0,
+            cached_tokens=(usage.get("prompt_tokens_details") or {}).get("cached_tokens") or 0,
+        )
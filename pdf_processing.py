@@ -0,0 +1,113 @@
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+import fitz
+
+from offload import offload_pool
+
+# Documents with at least this many selected pages have their text extracted in the offload pool's
+# worker processes, which open the document by path; the pool is long-lived, so this only has to
+# outweigh the round trip
+PARALLEL_TEXT_MIN_PAGES = int(os.getenv("PDF_PARALLEL_TEXT_MIN_PAGES", "20"))
+PAGES_PER_TASK = 25
+
+# PyMuPDF is not thread-safe, even across separate documents, so every in-process fitz call holds this lock;
+# worker processes have their own copy of the library
+fitz_lock = threading.RLock()
+
+
+@contextmanager
+def locked_document(*args, **kwargs):
+    """Open a document with fitz.open(*args, **kwargs), opening and closing it under fitz_lock."""
+    with fitz_lock:
+        document = fitz.open(*args, **kwargs)
+    try:
+        yield document
+    finally:
+        with fitz_lock:
+            document.close()
+
+
+def page_count(document):
+    """Return a document's number of pages."""
+    with fitz_lock:
+        return len(document)
+
+
+@contextmanager
+def open_pdf(file):
+    """Open a PDF, yielding (document, path).
+
+    Files already on disk are opened by path. In-memory uploads are written
+    from their buffer to a temporary file and opened from there, since
+    PyMuPDF would otherwise take a second in-memory copy; the path also lets
+    worker processes open the document. Callers must hold fitz_lock while
+    using the document.
+    """
+    name = getattr(file, "name", None)
+    if isinstance(name, str) and os.path.isabs(name) and os.path.isfile(name):
+        with locked_document(name) as document:
+            yield document, name
+        return
+
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            if hasattr(file, "getbuffer"):
+                with file.getbuffer() as data:
+                    f.write(data)
+            else:
+                f.write(file.read())
+        with locked_document(path) as document:
+            yield document, path
+    finally:
+        os.remove(path)
+
+
+def page_numbers(page_count, page_range=None):
+    """Return the 0-based page numbers selected by a 1-based inclusive (first, last) range."""
+    if page_range is None:
+        return list(range(page_count))
+    first, last = page_range
+    return list(range(max(first, 1) - 1, min(last, page_count)))
+
+
+def extract_page_texts(path, numbers):
+    """Return the text of the given pages of the PDF at path."""
+    with fitz.open(path) as document:
+        return [document.load_page(number).get_text() for number in numbers]
+
+
+def iter_page_texts(document, path, numbers):
+    """Yield (page number, text) in order, using the offload pool's worker processes for large documents.
+
+    Workers open the document by path, so no page content is pickled on the way in.
+    """
+    if path is None or len(numbers) < PARALLEL_TEXT_MIN_PAGES or not offload_pool.enabled:
+        for number in numbers:
+            with fitz_lock:
+                text = document.load_page(number).get_text()
+            yield number, text
+        return
+
+    batches = [numbers[i:i + PAGES_PER_TASK] for i in range(0, len(numbers), PAGES_PER_TASK)]
+    jobs = [offload_pool.submit(extract_page_texts, path, batch) for batch in batches]
+    try:
+        for batch, job in zip(batches, jobs):
+            yield from zip(batch, job.result())
+    finally:
+        # Stop queued batches if the reader is abandoned part way through
+        for job in jobs:
+            job.future.cancel()
+
+
+def iter_page_images(document, number):
+    """Yield (xref, encoded bytes) for each image on a page, one image at a time."""
+    with fitz_lock:
+        xrefs = [image[0] for image in document.get_page_images(number, full=True)]
+    for xref in xrefs:
+        with fitz_lock:
+            data = document.extract_image(xref)["image"]
+        yield xref, data
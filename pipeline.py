@@ -0,0 +1,775 @@
+import argparse
+import base64
+import hashlib
+import json
+import mimetypes
+import os
+import queue
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
+from functools import partial
+from io import BufferedReader, BytesIO, FileIO
+
+# Heavy third-party libraries (httpx, PIL, fitz, python-docx,
+# python-pptx, openpyxl) are imported inside the functions that use them, so
+# importing the pipeline stays cheap and a run only pays for the file types
+# it actually reads.
+from action_items import ACTION_ITEMS_SCHEMA, EXTRACTION_PROMPT, draft_prompt, parse_action_items
+from audio_processing import StubBackend, WhisperBackend, extract_audio, format_segments, transcribe_long_audio
+from image_dedup import MAX_HASH_DISTANCE, MIN_IMAGE_SIDE, ImageDeduplicator, image_fingerprint, shared_image_fingerprint
+from image_scheduler import ImageDescriptionScheduler
+from offload import offload_pool, shared_bytes
+from openai_gateway import GatewayError, ModelGateway
+from pre_canned_prompts_file import pre_canned_prompts
+from spreadsheet_processing import SAMPLE_ROWS, SUMMARY_MIN_ROWS
+from summarization import GenerationStats, choose_strategy, summarize
+from tracing import propagate, span, spans_metrics, tracer
+from transcription_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, TranscriptionCache, update_from_file
+
+DEFAULT_MODEL = "gpt-4o-mini"
+
+# Upper bound on files ingested at the same time
+MAX_FILE_WORKERS = int(os.getenv("MAX_FILE_WORKERS", "8"))
+
+# Upper bound on GPT task sections generated at the same time
+MAX_GENERATION_WORKERS = int(os.getenv("MAX_GENERATION_WORKERS", "6"))
+
+IMAGE_MODEL = "gpt-4o-mini"
+IMAGE_PROMPT = "You describe images to vision-impaired people to help them understand the specific, detailed contents and meaning of them. Please translate and describe the details and likely meaning of this image."
+
+# Shared instructions sent ahead of every transcript, so all section and draft
+# requests for one transcript begin with an identical, cacheable prefix
+TRANSCRIPT_SYSTEM_PROMPT = "You are an assistant that analyses meeting transcripts and related documents. The transcript follows; instructions for the task come after it."
+
+# Memoized chat responses, keyed by transcript hash, model and prompt
+response_cache = TranscriptionCache(
+    os.getenv("RESPONSE_CACHE_DIR", os.path.join(DEFAULT_CACHE_DIR, "responses")),
+    int(os.getenv("RESPONSE_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+)
+
+# Images described at once across every page, slide, sheet and file
+IMAGE_DESCRIPTION_CONCURRENCY = int(os.getenv("IMAGE_DESCRIPTION_CONCURRENCY", "10"))
+
+# Images at least this large are decoded and hashed in the offload pool; smaller ones cost less than the round trip
+OFFLOAD_MIN_IMAGE_BYTES = int(os.getenv("OFFLOAD_MIN_IMAGE_BYTES", str(256 * 1024)))
+
+# Shared across sessions so identical uploads are only transcribed once
+transcription_cache = TranscriptionCache(
+    os.getenv("TRANSCRIPTION_CACHE_DIR", DEFAULT_CACHE_DIR),
+    int(os.getenv("TRANSCRIPTION_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+)
+
+# Created on first use, so importing the pipeline never needs credentials; the lock
+# keeps file and image threads making their first calls at once from each building one
+gateway = None
+transcription_backend = None
+_gateway_lock = threading.RLock()
+
+def configure_gateway(api_key=None, **options):
+    """Create the model gateway every API call goes through.
+
+    api_key defaults to OPENAI_API_KEY; options (base_url, transport, budgets,
+    ...) are passed to ModelGateway, e.g. to point the pipeline at a fake server.
+    """
+    global gateway, transcription_backend
+    with _gateway_lock:
+        if gateway is not None:
+            gateway.close()
+        gateway = ModelGateway(api_key=api_key, **options)
+        transcription_backend = None
+        return gateway
+
+def get_gateway():
+    """Return the model gateway, creating it on first use."""
+    if gateway is not None:
+        return gateway
+    with _gateway_lock:
+        return gateway or configure_gateway()
+
+def get_transcription_backend():
+    """Return the speech-to-text backend; set TRANSCRIPTION_BACKEND=stub to run offline."""
+    global transcription_backend
+    with _gateway_lock:
+        if transcription_backend is None:
+            transcription_backend = StubBackend() if os.getenv("TRANSCRIPTION_BACKEND") == "stub" else WhisperBackend(get_gateway())
+        return transcription_backend
+
+def transcribe_audio(audio_file):
+    """Transcribe audio using Whisper model, chunking long recordings."""
+    return format_segments(transcribe_long_audio(audio_file, get_transcription_backend()))
+
+def generate_response(transcription, model, custom_prompt, on_delta=None, stats=None):
+    """Generate AI response based on the provided transcription and model.
+
+    The transcript is sent ahead of the task prompt so that every request for
+    the same transcript shares a prefix the API can cache. Responses are
+    memoized by (transcript hash, model, prompt), so regenerating an unchanged
+    section is free. When on_delta is given the response is streamed and
+    on_delta is called with each piece of text as it arrives. Token usage and
+    memo hits are added to stats when given.
+    """
+    with span("generate_response", model=model, streamed=on_delta is not None) as s:
+        key = response_cache.key(transcription.encode(), model, custom_prompt)
+        cached = response_cache.get(key)
+        s.set(memo_hit=cached is not None)
+        if cached is not None:
+            entry = json.loads(cached)
+            if stats:
+                stats.record_memo_hit(entry["latency"])
+            if on_delta:
+                on_delta(entry["text"])
+            return entry["text"]
+        return _complete_response(key, transcription, model, custom_prompt, on_delta, stats)
+
+def transcript_messages(transcription, custom_prompt):
+    """Return chat messages that put the transcript ahead of the task prompt."""
+    return [
+        {"role": "system", "content": TRANSCRIPT_SYSTEM_PROMPT},
+        {"role": "user", "content": transcription},
+        {"role": "user", "content": custom_prompt}
+    ]
+
+def _complete_response(key, transcription, model, custom_prompt, on_delta, stats):
+    """Call the model for a response that is not memoized yet, then memoize it."""
+    payload = {
+        "model": model,
+        "temperature": 0,
+        "messages": transcript_messages(transcription, custom_prompt)
+    }
+    started = time.perf_counter()
+    if on_delta is None:
+        response = get_gateway().chat(payload)
+        text, usage = response["choices"][0]["message"]["content"], response.get("usage")
+    else:
+        payload["stream_options"] = {"include_usage": True}
+        text, usage = get_gateway().stream_chat(payload, on_delta)
+
+    if stats:
+        stats.record_usage(usage)
+    response_cache.put(key, json.dumps({"text": text, "latency": time.perf_counter() - started}))
+    return text
+
+def generate_sections(transcription, prompts, on_update=None, on_progress=None, max_workers=MAX_GENERATION_WORKERS):
+    """Generate every GPT task section concurrently, streaming text back to the calling thread.
+
+    on_update(index, text) is called from the calling thread with a section's
+    text so far whenever new tokens arrive, so it may update Streamlit elements;
+    on_progress(completed, total) is called there as each section finishes.
+    Returns the section outputs in prompt order, per-section time to first
+    token and total latency in seconds, and the run's GenerationStats summary.
+    """
+    events = queue.Queue()
+    stats = GenerationStats()
+    complete = partial(generate_response, stats=stats)
+    metrics = [{"heading": p["heading"], "time_to_first_token": None, "total_latency": None} for p in prompts]
+
+    def run(index, prompt_info):
+        started = time.perf_counter()
+        try:
+            with span("section", heading=prompt_info["heading"], model=prompt_info["model"]):
+                return summarize(
+                    transcription, prompt_info["model"], prompt_info["prompt"], complete,
+                    on_delta=lambda delta: events.put((index, delta, time.perf_counter() - started)),
+                )
+        finally:
+            events.put((index, None, time.perf_counter() - started))
+
+    texts = [""] * len(prompts)
+    with span("generate_sections", sections=len(prompts)) as s, \
+            ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(prompts)))) as executor:
+        run = propagate(run)
+        futures = [executor.submit(run, i, prompt_info) for i, prompt_info in enumerate(prompts)]
+        remaining = len(prompts)
+        while remaining:
+            # Drain everything that has arrived so each section is redrawn at most once per pass
+            batch = [events.get()]
+            while True:
+                try:
+                    batch.append(events.get_nowait())
+                except queue.Empty:
+                    break
+            updated = set()
+            for index, delta, elapsed in batch:
+                if delta is None:
+                    metrics[index]["total_latency"] = elapsed
+                    remaining -= 1
+                    if on_progress:
+                        on_progress(len(prompts) - remaining, len(prompts))
+                    continue
+                if metrics[index]["time_to_first_token"] is None:
+                    metrics[index]["time_to_first_token"] = elapsed
+                texts[index] += delta
+                updated.add(index)
+            if on_update:
+                for index in sorted(updated):
+                    on_update(index, texts[index])
+        outputs = [future.result() for future in futures]
+        summary = stats.summary()
+        s.set(tokens_in=summary["prompt_tokens"], tokens_out=summary["completion_tokens"],
+              cached_tokens=summary["cached_tokens"], memo_hits=summary["memo_hits"])
+    return outputs, metrics, summary
+
+def extract_action_items(transcription, action_items_text, model=DEFAULT_MODEL):
+    """Extract generated action items into dicts with task, owner, due_date and subtasks.
+
+    The model's structured output mode fills in ACTION_ITEMS_SCHEMA, with the
+    transcript sent first when it fits so owners and due dates can be taken
+    from it. The result is memoized like any other response. If the API
+    rejects the schema (a 400) or the model returns unusable JSON, the text is
+    parsed line by line instead; other API errors are raised. Returns
+    (items, structured), where structured is False for the line parser's items.
+    """
+    prompt = EXTRACTION_PROMPT.format(action_items=action_items_text)
+    if choose_strategy(transcription, model, prompt) != "single":
+        transcription = "(The transcript is too long to include here; use the list alone.)"
+    key = response_cache.key(transcription.encode(), model, prompt + json.dumps(ACTION_ITEMS_SCHEMA, sort_keys=True))
+
+    with span("extract_action_items", model=model) as s:
+        content = response_cache.get(key)
+        s.set(memo_hit=content is not None)
+        if content is None:
+            payload = {
+                "model": model,
+                "temperature": 0,
+                "messages": transcript_messages(transcription, prompt),
+                "response_format": {
+                    "type": "json_schema",
+                    "json_schema": {"name": "action_items", "strict": True, "schema": ACTION_ITEMS_SCHEMA},
+                },
+            }
+            try:
+                content = get_gateway().chat(payload)["choices"][0]["message"]["content"]
+                items = json.loads(content)["action_items"]
+            except GatewayError as e:
+                if e.status_code != 400:
+                    raise
+                s.set(fallback=True)
+                return parse_action_items(action_items_text), False
+            except (ValueError, KeyError, TypeError):
+                s.set(fallback=True)
+                return parse_action_items(action_items_text), False
+            response_cache.put(key, content)
+        else:
+            items = json.loads(content)["action_items"]
+        s.set(items=len(items))
+        return items, True
+
+def generate_drafts(transcription, requests, model=DEFAULT_MODEL, on_progress=None, max_workers=MAX_GENERATION_WORKERS):
+    """Generate drafts for (kind, action item) pairs concurrently, returning their texts in order.
+
+    Every draft starts with the same transcript prefix, so the API can serve
+    it from its prompt cache, and each draft is memoized by its prompt.
+    on_progress(completed, total) is called from the calling thread as each
+    draft finishes.
+    """
+    complete = partial(generate_response, stats=GenerationStats())
+    draft = propagate(lambda kind, item: summarize(transcription, model, draft_prompt(kind, item), complete))
+    results = [None] * len(requests)
+    with span("generate_drafts", drafts=len(requests)), \
+            ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(requests)))) as executor:
+        futures = {executor.submit(draft, kind, item): i for i, (kind, item) in enumerate(requests)}
+        for completed, future in enumerate(as_completed(futures), start=1):
+            results[futures[future]] = future.result()
+            if on_progress:
+                on_progress(completed, len(requests))
+    return results
+
+def save_as_docx(minutes):
+    """Save the generated meeting minutes as a Word document."""
+    from docx import Document
+
+    with span("save_as_docx", sections=len(minutes)) as s:
+        doc = Document()
+        for key, value in minutes.items():
+            doc.add_heading(key.replace('_', ' ').title(), level=1)
+            doc.add_paragraph(value)
+        buffer = BytesIO()
+        doc.save(buffer)
+        s.set(bytes=buffer.tell())
+        buffer.seek(0)
+        return buffer
+
+def transcribe_image(image_data):
+    """Transcribe encoded image bytes using GPT-4's multimodal capabilities."""
+    with span("describe_image", model=IMAGE_MODEL, cache_hit=True, bytes=len(image_data)) as s:
+        # The bytes are sent as uploaded; decoding and re-encoding them would only burn CPU
+        base64_image = base64.b64encode(image_data).decode()
+
+        def describe():
+            s.set(cache_hit=False)
+            return describe_encoded_image(base64_image)
+
+        return transcription_cache.get_or_compute(base64_image.encode(), IMAGE_MODEL, IMAGE_PROMPT, describe)
+
+def describe_encoded_image(base64_image):
+    """Describe a Base64-encoded image with the vision model."""
+    payload = {
+        "model": IMAGE_MODEL,
+        "messages": [
+            {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": IMAGE_PROMPT},
+                    {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}}
+                ]
+            }
+        ],
+        "max_tokens": 300
+    }
+
+    response = get_gateway().chat(payload)
+    return response['choices'][0]['message']['content']
+
+def fingerprint_image(image_data):
+    """Return an image's size and perceptual hash, decoding large images in the offload pool.
+
+    The bytes reach the worker through shared memory rather than a pickle.
+    """
+    if not offload_pool.enabled or len(image_data) < OFFLOAD_MIN_IMAGE_BYTES:
+        return image_fingerprint(image_data)
+    with span("offload.fingerprint_image", bytes=len(image_data)), shared_bytes(image_data) as (name, size):
+        return offload_pool.run(shared_image_fingerprint, name, size)
+
+def document_images():
+    """Return a deduplicator that queues one document's images on the shared describer."""
+    return ImageDeduplicator(image_scheduler.submit, fingerprint_image)
+
+def queue_image(images, image_data, label="Image", xref=None):
+    """Queue encoded image bytes through a document's deduplicator, returning a placeholder for join_parts."""
+    future = images.queue(image_data, xref=xref)
+    if future is None:
+        return ""
+    return label, future
+
+def record_images(s, images):
+    """Add a deduplicator's image counts to a reader's span."""
+    s.set(images=images.unique, duplicate_images=images.duplicates, skipped_images=images.skipped)
+
+def join_parts(parts):
+    """Join reader output, filling in queued image descriptions where they occurred."""
+    return "".join(part if isinstance(part, str) else f"\n[{part[0]}: {part[1].result()}]\n" for part in parts)
+
+def read_docx(file):
+    """Read text and images from a DOCX file."""
+    import docx
+
+    with span("read_docx") as s:
+        doc = docx.Document(file)
+        images = document_images()
+        parts = [para.text + "\n" for para in doc.paragraphs]
+        s.set(paragraphs=len(parts))
+
+        # Loop through all elements in the document to find images
+        for rel in doc.part.rels.values():
+            if "image" in rel.target_ref:
+                image_data = rel.target_part.blob  # Retrieve image binary data
+                parts.append(queue_image(images, image_data))
+
+        record_images(s, images)
+        return join_parts(parts)
+
+def iter_pdf(file, images, page_range=None, s=None):
+    """Yield a PDF's text and queued image placeholders page by page.
+
+    Pages are visited one at a time and each image is handed to the
+    describer as soon as it is decoded, so no page's images are held together.
+    Pages read are counted on the span s when given.
+    """
+    from pdf_processing import iter_page_images, iter_page_texts, open_pdf, page_count, page_numbers
+
+    with open_pdf(file) as (document, path):
+        for page_num, page_text in iter_page_texts(document, path, page_numbers(page_count(document), page_range)):
+            yield f"\nPage {page_num + 1}\n{page_text}"
+            if s:
+                s.add("pages")
+
+            for xref, image_data in iter_page_images(document, page_num):
+                yield queue_image(images, image_data, f"Image on page {page_num + 1}", xref=xref)
+
+def read_pdf(file, page_range=None):
+    """Read text and images from a PDF file, optionally limited to a 1-based (first, last) page range."""
+    with span("read_pdf") as s:
+        images = document_images()
+        # Read ahead of the descriptions, as far as the deduplicator's bound on pending images allows
+        parts = list(iter_pdf(file, images, page_range, s))
+        record_images(s, images)
+        return join_parts(parts)
+
+def read_pptx(file):
+    """Read text and images from a PowerPoint file."""
+    from pptx import Presentation
+
+    with span("read_pptx") as s:
+        presentation = Presentation(file)
+        images = document_images()
+        parts = []
+
+        for slide_num, slide in enumerate(presentation.slides, start=1):
+            slide_text = ""
+            slide_images = []
+
+            for shape in slide.shapes:
+                if hasattr(shape, "text"):
+                    slide_text += shape.text + "\n"
+
+                # Ensure to correctly handle image shapes
+                if hasattr(shape, "image"):
+                    image_stream = shape.image.blob  # Retrieve image binary data
+                    slide_images.append(queue_image(images, image_stream))
+
+            parts.append(f"Slide {slide_num}:\n{slide_text}")
+            parts.extend(slide_images)
+
+        s.set(slides=len(presentation.slides))
+        record_images(s, images)
+        return join_parts(parts)
+
+def read_txt(file):
+    """Read text from a TXT file."""
+    return file.read().decode("utf-8")
+
+def read_excel(file):
+    """Read text and images from an Excel file.
+
+    Sheets are streamed row by row in read-only mode, so memory stays flat
+    however large the workbook is; large sheets are summarized (see
+    spreadsheet_processing). Embedded images are read from the archive
+    afterwards, only if there are any.
+    """
+    from spreadsheet_processing import iter_workbook_text, workbook_images
+
+    with span("read_excel") as s:
+        counts = Counter()
+        parts = list(iter_workbook_text(file, counts=counts))
+        images = document_images()
+        for image_data in workbook_images(file):
+            parts.append(queue_image(images, image_data))
+
+        s.set(**counts)
+        record_images(s, images)
+        return join_parts(parts)
+
+# One scheduler for the whole process, so concurrency is bounded globally
+image_scheduler = ImageDescriptionScheduler(transcribe_image, max_workers=IMAGE_DESCRIPTION_CONCURRENCY)
+
+def transcribe_video(uploaded_file):
+    """Extract the audio track from a video file and transcribe it."""
+    suffix = ".mov" if uploaded_file.type == "video/quicktime" else ".mp4"
+    with ExitStack() as stack:
+        with span("extract_audio", bytes=file_size(uploaded_file)) as s:
+            audio_file = stack.enter_context(extract_audio(uploaded_file, suffix))
+            s.set(audio_bytes=os.fstat(audio_file.fileno()).st_size)
+        return transcribe_audio(audio_file)
+
+def read_image(uploaded_file):
+    """Describe an uploaded image file."""
+    data = uploaded_file.getvalue() if hasattr(uploaded_file, "getvalue") else uploaded_file.read()
+    return image_scheduler.submit(data).result()
+
+# Reader for each supported upload MIME type
+FILE_READERS = {
+    "video/quicktime": transcribe_video,
+    "video/mp4": transcribe_video,
+    "audio/mpeg": transcribe_audio,
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document": read_docx,
+    "text/plain": read_txt,
+    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet": read_excel,
+    "application/pdf": read_pdf,
+    "application/vnd.openxmlformats-officedocument.presentationml.presentation": read_pptx,
+    "image/jpeg": read_image,
+    "image/png": read_image,
+}
+
+# Output format version of each reader, part of its cache key; bump one when the text it produces changes
+READER_VERSIONS = {
+    "transcribe_audio": 1,
+    "transcribe_video": 1,
+    "read_docx": 1,
+    "read_excel": 1,
+    "read_pdf": 1,
+    "read_pptx": 1,
+    "read_image": 1,
+}
+
+# Readers that describe embedded images, filtered by size and deduplicated first
+IMAGE_BEARING_READERS = (read_docx, read_excel, read_pdf, read_pptx)
+
+def file_content(file):
+    """Return what an upload's content is hashed from: its in-memory buffer, or the file itself for a LocalFile."""
+    return file.getbuffer() if hasattr(file, "getbuffer") else file
+
+def file_size(file):
+    """Return an uploaded file's size in bytes."""
+    return file.size if hasattr(file, "size") else file.getbuffer().nbytes
+
+def file_digest(file):
+    """Return the sha256 hex digest of an uploaded file's content, streaming files on disk."""
+    if hasattr(file, "getbuffer"):
+        return hashlib.sha256(file.getbuffer()).hexdigest()
+    digest = hashlib.sha256()
+    update_from_file(digest, file)
+    return digest.hexdigest()
+
+def plan_ingestion(uploaded_files, parsed_files):
+    """Reconcile parsed_files ({content digest: text}) with the current set of files.
+
+    Entries for files no longer in the set are dropped. Returns the set's
+    digests in upload order, with repeated uploads of the same content
+    listed once, and the (digest, file) pairs whose content has not been
+    parsed yet.
+    """
+    files = {}
+    for uploaded_file in uploaded_files:
+        files.setdefault(file_digest(uploaded_file), uploaded_file)
+    for digest in [digest for digest in parsed_files if digest not in files]:
+        del parsed_files[digest]
+    return list(files), [(digest, f) for digest, f in files.items() if digest not in parsed_files]
+
+def cache_signature(reader, page_range=None):
+    """Return the (model, prompt) pair that a reader's output depends on.
+
+    The model string also carries the reader's format version and the
+    settings that change its output, so changing either misses the cache.
+    """
+    version = f"{reader.__name__}@{READER_VERSIONS[reader.__name__]}"
+    if reader in (transcribe_audio, transcribe_video):
+        return f"{version}:{get_transcription_backend().model}", ""
+    parts = [version, IMAGE_MODEL]
+    if reader is read_excel:
+        parts.append(f"summary_min_rows={SUMMARY_MIN_ROWS},sample_rows={SAMPLE_ROWS}")
+    if reader in IMAGE_BEARING_READERS:
+        parts.append(f"min_image_side={MIN_IMAGE_SIDE},max_hash_distance={MAX_HASH_DISTANCE}")
+    if reader is read_pdf and page_range is not None:
+        parts.append("pages={}-{}".format(*page_range))
+    return ":".join(parts), IMAGE_PROMPT
+
+def process_uploaded_file(uploaded_file, page_range=None):
+    """Dispatch an uploaded file to the reader for its type, via the transcription cache.
+
+    page_range, a 1-based inclusive (first, last) pair, limits which pages of a PDF are read.
+    """
+    reader = FILE_READERS.get(uploaded_file.type)
+    if reader is None:
+        return None
+    with span("read_file", file_type=uploaded_file.type, reader=reader.__name__, bytes=file_size(uploaded_file)) as s:
+        if reader is read_txt:
+            return reader(uploaded_file)
+        s.set(cache_hit=True)
+
+        def read():
+            s.set(cache_hit=False)
+            return reader(uploaded_file, page_range) if reader is read_pdf else reader(uploaded_file)
+
+        model, prompt = cache_signature(reader, page_range)
+        return transcription_cache.get_or_compute(file_content(uploaded_file), model, prompt, read)
+
+def process_files_concurrently(uploaded_files, on_progress=None, max_workers=MAX_FILE_WORKERS, page_range=None):
+    """Process uploaded files concurrently, returning results in upload order.
+
+    on_progress(uploaded_file, completed, total, error) is called from the
+    calling thread as each file finishes, so it may safely update UI
+    elements. Files that fail or have no reader yield None. page_range is
+    passed to process_uploaded_file.
+    """
+    total = len(uploaded_files)
+    results = [None] * total
+    with span("process_files", files=total, bytes=sum(file_size(f) for f in uploaded_files)):
+        executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, total)))
+        try:
+            process = propagate(process_uploaded_file)
+            futures = {executor.submit(process, f, page_range): i for i, f in enumerate(uploaded_files)}
+            for completed, future in enumerate(as_completed(futures), start=1):
+                i = futures[future]
+                error = None
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    error = e
+                if on_progress:
+                    on_progress(uploaded_files[i], completed, total, error)
+        finally:
+            # Every future is done unless the caller was interrupted (e.g. a Streamlit rerun); then drop queued files
+            executor.shutdown(wait=False, cancel_futures=True)
+    return results
+
+
+# MIME types of the supported file extensions, for files read from disk
+EXTENSION_TYPES = {
+    ".mp3": "audio/mpeg",
+    ".mp4": "video/mp4",
+    ".mov": "video/quicktime",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".txt": "text/plain",
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ".pdf": "application/pdf",
+    ".pptx": "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+}
+
+class LocalFile(BufferedReader):
+    """A file on disk opened for reading and presented like a Streamlit upload, with type and size attributes.
+
+    Its name is the absolute path, so readers that can work from a path
+    (PDF, audio and video) never load the file into memory; content is
+    hashed by streaming it.
+    """
+
+    def __init__(self, path):
+        super().__init__(FileIO(os.path.abspath(path)))
+        extension = os.path.splitext(path)[1].lower()
+        self.type = EXTENSION_TYPES.get(extension) or mimetypes.guess_type(path)[0]
+        self.size = os.fstat(self.fileno()).st_size
+
+def list_input_files(directory):
+    """Return the supported files in a directory, sorted by name."""
+    return [
+        os.path.join(directory, name) for name in sorted(os.listdir(directory))
+        if os.path.splitext(name)[1].lower() in EXTENSION_TYPES and os.path.isfile(os.path.join(directory, name))
+    ]
+
+class IngestionError(Exception):
+    """Files could not be read; errors holds (path, exception) pairs."""
+
+    def __init__(self, message, errors):
+        super().__init__(message)
+        self.errors = errors
+
+def ingest(paths, on_progress=None, allow_partial=False, page_range=None):
+    """Transcribe and read files from disk, returning the joined transcription.
+
+    Raises IngestionError if any file fails to read, or with allow_partial
+    only if nothing at all could be read. page_range limits the pages read from PDFs.
+    """
+    errors = []
+
+    def record(uploaded_file, completed, total, error):
+        if error:
+            errors.append((uploaded_file.name, error))
+        if on_progress:
+            on_progress(uploaded_file, completed, total, error)
+
+    with ExitStack() as stack:
+        files = [stack.enter_context(LocalFile(path)) for path in paths]
+        results = process_files_concurrently(files, on_progress=record, page_range=page_range)
+    transcription = "\n\n".join(result for result in results if result)
+    if errors and not (allow_partial and transcription):
+        details = "; ".join(f"{os.path.basename(path)}: {error}" for path, error in errors)
+        raise IngestionError(f"{len(errors)} of {len(paths)} files could not be read ({details})", errors)
+    if not transcription:
+        raise IngestionError("No text could be read from the input files", errors)
+    return transcription
+
+def summary_prompts(summary_type, sections=None, model=DEFAULT_MODEL):
+    """Return the GPT task prompts for a pre_canned_prompts summary type.
+
+    summary_type may be a key such as "meeting_summary" or a label such as
+    "Meeting Summary". sections limits the result to those section keys.
+    """
+    prompts = pre_canned_prompts[summary_type.lower().replace(" ", "_")]
+    unknown = sorted(set(sections or ()) - set(prompts))
+    if unknown:
+        raise ValueError(f"Unknown sections for {summary_type}: {', '.join(unknown)} (choose from {', '.join(prompts)})")
+    return [
+        {"prompt": value["prompt"], "model": model, "heading": value["heading"]}
+        for key, value in prompts.items() if sections is None or key in sections
+    ]
+
+def generate_document(transcription, prompts):
+    """Generate every section for a transcription, returning {heading: text}."""
+    outputs, _, _ = generate_sections(transcription, prompts)
+    return {prompt_info["heading"]: output for prompt_info, output in zip(prompts, outputs)}
+
+def summarize_files(paths, summary_type, output_path, sections=None, model=DEFAULT_MODEL, allow_partial=False, page_range=None):
+    """Ingest files, generate a summary document and write it as DOCX to output_path."""
+    prompts = summary_prompts(summary_type, sections, model)
+    transcription = ingest(paths, on_progress=report_failure, allow_partial=allow_partial, page_range=page_range)
+    minutes = generate_document(transcription, prompts)
+    with open(output_path, "wb") as f:
+        f.write(save_as_docx(minutes).getvalue())
+    return output_path
+
+def summarize_directory(directory, summary_type, output_path, sections=None, model=DEFAULT_MODEL, allow_partial=False, page_range=None):
+    """Summarize every supported file in a directory into one DOCX document."""
+    return summarize_files(list_input_files(directory), summary_type, output_path, sections, model, allow_partial, page_range)
+
+def parse_page_range(text):
+    """Parse a 1-based inclusive page range, "FIRST-LAST" or a single page "N", into (first, last)."""
+    first, separator, last = text.partition("-")
+    try:
+        page_range = int(first), int(last if separator else first)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected FIRST-LAST or N, got {text!r}")
+    if not 1 <= page_range[0] <= page_range[1]:
+        raise argparse.ArgumentTypeError(f"expected 1 <= FIRST <= LAST, got {text!r}")
+    return page_range
+
+def report_failure(uploaded_file, completed, total, error):
+    """Progress callback that reports files which failed to read on stderr."""
+    if error:
+        print(f"{uploaded_file.name}: could not be read: {error}", file=sys.stderr)
+
+def _summarize_job(job):
+    """Summarize one directory in a worker process, returning (output path, error, the job's span metrics)."""
+    output_path, error = None, None
+    with tracer.collect() as spans:
+        try:
+            output_path = summarize_directory(*job)
+        except Exception as e:
+            error = str(e)
+    return output_path, error, spans_metrics(spans)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize directories of meeting files into DOCX documents.")
+    parser.add_argument("directories", nargs="+", help="directories of recordings, documents and images; one document is written per directory")
+    parser.add_argument("--summary-type", default="meeting_summary", choices=sorted(pre_canned_prompts), help="pre-canned prompt set to use")
+    parser.add_argument("--sections", nargs="+", help="section keys to include (default: all sections of the summary type)")
+    parser.add_argument("--model", default=DEFAULT_MODEL, help="chat model used for every section")
+    parser.add_argument("--output-dir", default=".", help="where to write <directory name>.docx files")
+    parser.add_argument("--jobs", type=int, default=1, help="directories processed in parallel worker processes")
+    parser.add_argument("--trace-file", help="append every timing span as a JSON line to this file")
+    parser.add_argument("--metrics-file", help="write per-stage totals over all directories to this file in the Prometheus text format")
+    parser.add_argument("--pages", type=parse_page_range, metavar="FIRST-LAST", help="only read these pages (1-based, inclusive) of each PDF")
+    parser.add_argument("--allow-partial", action="store_true", help="write a document even if some files could not be read")
+    args = parser.parse_args(argv)
+    try:
+        summary_prompts(args.summary_type, args.sections, args.model)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.trace_file:
+        # Worker processes read the path from the environment when they import the tracer
+        os.environ["TRACE_EXPORT_PATH"] = tracer.export_path = os.path.abspath(args.trace_file)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    jobs = [
+        (directory, args.summary_type, os.path.join(args.output_dir, os.path.basename(os.path.normpath(directory)) + ".docx"), args.sections, args.model, args.allow_partial, args.pages)
+        for directory in args.directories
+    ]
+    failures = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+        futures = {executor.submit(_summarize_job, job): job[0] for job in jobs}
+        for future in as_completed(futures):
+            try:
+                output_path, error, metrics = future.result()
+            except Exception as e:
+                output_path, error, metrics = None, str(e), {}
+            # Spans are recorded in the worker processes, so the totals are gathered here
+            tracer.merge(metrics)
+            if error is None:
+                print(f"{futures[future]}: wrote {output_path}")
+            else:
+                failures += 1
+                print(f"{futures[future]}: failed: {error}", file=sys.stderr)
+    if args.metrics_file:
+        with open(args.metrics_file, "w") as f:
+            f.write(tracer.prometheus())
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
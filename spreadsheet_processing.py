@@ -0,0 +1,246 @@
+import os
+import zipfile
+from collections import Counter
+from datetime import date, datetime, time
+
+# openpyxl is imported where workbooks are opened, so the rendering helpers load without it
+
+# Sheets with more data rows than this are summarized statistically instead of dumped; 0 keeps every row
+SUMMARY_MIN_ROWS = int(os.getenv("EXCEL_SUMMARY_MIN_ROWS", "2000"))
+SAMPLE_ROWS = int(os.getenv("EXCEL_SAMPLE_ROWS", "5"))
+
+# Embedded media PIL can open; other formats (e.g. EMF/WMF) are skipped
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".bmp", ".tif", ".tiff", ".webp"}
+
+# Distinct text values tracked per column when summarizing, and how many of the most common are listed
+MAX_TRACKED_VALUES = 1000
+TOP_VALUES = 5
+
+
+def cell_text(value):
+    """Render a cell value as prompt text."""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def trim_row(row):
+    """Drop a row's trailing empty cells, returning () for an empty row."""
+    end = len(row)
+    while end and (row[end - 1] is None or row[end - 1] == ""):
+        end -= 1
+    return row[:end]
+
+
+def iter_compressed_rows(rows):
+    """Yield trimmed non-empty rows, with runs of empty rows replaced by their length."""
+    empty = 0
+    for row in rows:
+        row = trim_row(row)
+        if not row:
+            empty += 1
+            continue
+        if empty:
+            yield empty
+            empty = 0
+        yield row
+
+
+def empty_run_text(count):
+    return "\n" if count == 1 else f"[{count} empty rows]\n"
+
+
+def used_columns(rows):
+    """Return the indexes of columns holding a value in any of the rows."""
+    used = set()
+    for row in rows:
+        if isinstance(row, tuple):
+            used.update(i for i, value in enumerate(row) if value is not None and value != "")
+    return sorted(used)
+
+
+def render_rows(rows):
+    """Render buffered rows as tab-separated lines, pruning columns that are empty throughout."""
+    columns = used_columns(rows)
+    lines = []
+    for row in rows:
+        if isinstance(row, int):
+            lines.append(empty_run_text(row))
+        else:
+            lines.append("\t".join(cell_text(row[i]) if i < len(row) else "" for i in columns) + "\n")
+    return "".join(lines)
+
+
+class ColumnStats:
+    """Running type counts and aggregates for one column, in constant memory."""
+
+    def __init__(self):
+        self.values = 0
+        self.numbers = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+        # (earliest, latest) per temporal type; openpyxl mixes datetime and time in one column, and they do not compare
+        self.ranges = {}
+        self.dates = 0
+        self.texts = Counter()
+        self.text_count = 0
+        self.overflow = False
+
+    def add(self, value):
+        if value is None or value == "":
+            return
+        self.values += 1
+        if isinstance(value, bool):
+            value = str(value)
+        if isinstance(value, (int, float)):
+            self.numbers += 1
+            self.total += value
+            self.minimum = value if self.minimum is None else min(self.minimum, value)
+            self.maximum = value if self.maximum is None else max(self.maximum, value)
+        elif isinstance(value, (datetime, date, time)):
+            self.dates += 1
+            kind = type(value)
+            earliest, latest = self.ranges.get(kind, (value, value))
+            self.ranges[kind] = (min(earliest, value), max(latest, value))
+        else:
+            self.text_count += 1
+            text = str(value)
+            if text in self.texts or len(self.texts) < MAX_TRACKED_VALUES:
+                self.texts[text] += 1
+            else:
+                self.overflow = True
+
+    def describe(self, name):
+        """Return one summary line for the column."""
+        if not self.values:
+            return None
+        kinds = [kind for kind, count in (("number", self.numbers), ("date", self.dates), ("text", self.text_count)) if count]
+        details = [f"{'/'.join(kinds)}; {self.values:,} values"]
+        if self.numbers:
+            details.append(
+                f"min {cell_text(self.minimum)}, max {cell_text(self.maximum)}, "
+                f"mean {self.total / self.numbers:,.4g}, sum {self.total:,.6g}"
+            )
+        for earliest, latest in self.ranges.values():
+            details.append(f"from {earliest} to {latest}")
+        if self.text_count:
+            distinct = f"over {MAX_TRACKED_VALUES:,}" if self.overflow else f"{len(self.texts):,}"
+            common = ", ".join(f"{text} ({count:,})" for text, count in self.texts.most_common(TOP_VALUES))
+            details.append(f"{distinct} distinct; most common: {common}")
+        return f"- {name}: " + "; ".join(details)
+
+
+class SheetSummary:
+    """Header, sample rows and per-column aggregates of a sheet too large to include whole."""
+
+    def __init__(self, header, sample_rows):
+        self.header = header
+        self.samples = [row for row in sample_rows if isinstance(row, tuple)][:SAMPLE_ROWS]
+        self.rows = 0
+        self.empty_rows = 0
+        self.columns = []
+
+    def add(self, row):
+        if isinstance(row, int):
+            self.empty_rows += row
+            return
+        self.rows += 1
+        while len(self.columns) < len(row):
+            self.columns.append(ColumnStats())
+        for stats, value in zip(self.columns, row):
+            stats.add(value)
+
+    def column_name(self, index):
+        if self.header and index < len(self.header) and self.header[index] not in (None, ""):
+            return cell_text(self.header[index])
+        from openpyxl.utils import get_column_letter
+
+        return f"Column {get_column_letter(index + 1)}"
+
+    def render(self):
+        used = [i for i, stats in enumerate(self.columns) if stats.values]
+        lines = [
+            f"Large table summarized: {self.rows:,} data rows x {len(used)} non-empty columns"
+            + (f", {self.empty_rows:,} empty rows skipped" if self.empty_rows else "")
+            + f". {len(self.samples)} sample rows follow.\n"
+        ]
+        if self.header:
+            lines.append("Header: " + "\t".join(self.column_name(i) for i in used) + "\n")
+        lines.append("Sample rows:\n")
+        lines.extend("\t".join(cell_text(row[i]) if i < len(row) else "" for i in used) + "\n" for row in self.samples)
+        lines.append("Columns:\n")
+        lines.extend(self.columns[i].describe(self.column_name(i)) + "\n" for i in used)
+        return "".join(lines)
+
+
+def is_header(row):
+    """Treat a first row made up only of text as the table's header."""
+    return all(isinstance(value, str) for value in row if value is not None)
+
+
+def sheet_text(worksheet, summary_min_rows=SUMMARY_MIN_ROWS, counts=None):
+    """Render one read-only worksheet in a single streaming pass.
+
+    Rows are buffered until the sheet proves larger than summary_min_rows;
+    smaller sheets are rendered whole with empty columns pruned and empty
+    rows compressed, larger ones as a SheetSummary. counts, when given, is
+    updated with the sheet's rows and whether it was summarized.
+    """
+    header = None
+    buffered = []
+    summary = None
+    data_rows = 0
+    for row in iter_compressed_rows(worksheet.iter_rows(values_only=True)):
+        if header is None:
+            if isinstance(row, int):
+                continue  # leading empty rows
+            header = row if is_header(row) else ()
+            if header:
+                continue
+        if isinstance(row, tuple):
+            data_rows += 1
+        if summary is not None:
+            summary.add(row)
+            continue
+        buffered.append(row)
+        if summary_min_rows and data_rows > summary_min_rows:
+            summary = SheetSummary(header, buffered)
+            for buffered_row in buffered:
+                summary.add(buffered_row)
+            buffered = None
+
+    if counts is not None:
+        counts["rows"] += data_rows
+        counts["summarized_sheets"] += summary is not None
+    if summary is not None:
+        return summary.render()
+    return render_rows(([header] if header else []) + buffered)
+
+
+def iter_workbook_text(file, summary_min_rows=SUMMARY_MIN_ROWS, counts=None):
+    """Yield the text of each sheet of a workbook, opened in read-only streaming mode."""
+    import openpyxl
+
+    workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        for name in workbook.sheetnames:
+            worksheet = workbook[name]
+            if not hasattr(worksheet, "iter_rows"):
+                continue  # chartsheets hold no cells
+            yield f"Sheet: {name}\n" + sheet_text(worksheet, summary_min_rows, counts)
+            if counts is not None:
+                counts["sheets"] += 1
+    finally:
+        workbook.close()
+
+
+def workbook_images(file):
+    """Yield the bytes of each image embedded in a workbook, read straight from its xl/media folder."""
+    file.seek(0)
+    with zipfile.ZipFile(file) as archive:
+        for name in archive.namelist():
+            if name.startswith("xl/media/") and os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS:
+                yield archive.read(name)
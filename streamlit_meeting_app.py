@@ -1,224 +1,115 @@
+import hashlib
+import json
+import uuid
 import streamlit as st
-import os
-from openai import OpenAI
-from docx import Document
-from io import BytesIO
-import moviepy.editor as mp
-import tempfile
-import docx
-import pandas as pd
-import fitz
-import base64
-import requests
-from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
-from streamlit_quill import st_quill
-from pptx import Presentation
-from PIL import Image
-from concurrent.futures import ThreadPoolExecutor
-import openpyxl
-from openpyxl.drawing.image import Image as OpenpyxlImage
+from action_items import parse_action_items
+from offload import offload_pool, session as offload_session
 from pre_canned_prompts_file import pre_canned_prompts
-from openpyxl import load_workbook
-from defusedxml.common import DefusedXmlException
-import defusedxml.ElementTree as ET
-
-api_key = st.secrets["OPENAI_API_KEY"]
-
-# Initialize OpenAI client
-client = OpenAI(api_key=api_key)
-
-def transcribe_audio(audio_file):
-    """Transcribe audio using Whisper model."""
-    transcription = client.audio.transcriptions.create(model="whisper-1", file=audio_file)
-    return transcription['text'] if isinstance(transcription, dict) else transcription.text
-
-def generate_response(transcription, model, custom_prompt):
-    """Generate AI response based on the provided transcription and model."""
-    response = client.chat.completions.create(
-        model=model,
-        temperature=0,
-        messages=[
-            {"role": "system", "content": custom_prompt},
-            {"role": "user", "content": transcription}
-        ]
-    )
-    return response.choices[0].message.content
-
-def save_as_docx(minutes):
-    """Save the generated meeting minutes as a Word document."""
-    doc = Document()
-    for key, value in minutes.items():
-        doc.add_heading(key.replace('_', ' ').title(), level=1)
-        doc.add_paragraph(value)
-    buffer = BytesIO()
-    doc.save(buffer)
-    buffer.seek(0)
-    return buffer
-
-def convert_video_to_mp3(uploaded_file, suffix):
-    """Convert video files to MP3 format."""
-    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_video_file:
-        temp_video_file.write(uploaded_file.getbuffer())
-        temp_video_file_path = temp_video_file.name
-
-    video = mp.VideoFileClip(temp_video_file_path)
-
-    if not video.audio:
-        st.error(f"The uploaded {suffix} file does not contain an audio track.")
-        return None
-
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as audio_file:
-        video.audio.write_audiofile(audio_file.name)
-        return audio_file.name
-
-def encode_image(image):
-    """Encode an image to Base64 format."""
-    with BytesIO() as buffer:
-        image.save(buffer, format=image.format)
-        return base64.b64encode(buffer.getvalue()).decode()
-
-def transcribe_image(image_file):
-    """Transcribe image using GPT-4's multimodal capabilities."""
-    base64_image = encode_image(image_file)
-
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {os.getenv('OPENAI_API_KEY')}"
-    }
-
-    payload = {
-        "model": "gpt-4o-mini",
-        "messages": [
-            {
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": "You describe images to vision-impaired people to help them understand the specific, detailed contents and meaning of them. Please translate and describe the details and likely meaning of this image."},
-                    {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{base64_image}"}}
-                ]
-            }
-        ],
-        "max_tokens": 300
-    }
-
-    response = requests.post("https://api.openai.com/v1/chat/completions", headers=headers, json=payload)
-    return response.json()['choices'][0]['message']['content']
-
-def process_images_concurrently(images):
-    """Process and transcribe images concurrently."""
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        transcriptions = list(executor.map(transcribe_image, images))
-    return transcriptions
-
-def read_docx(file):
-    """Read text and images from a DOCX file."""
-    doc = docx.Document(file)
-    result = ""
-    images = []
-
-    for para in doc.paragraphs:
-        result += para.text + "\n"
-
-    # Loop through all elements in the document to find images
-    for rel in doc.part.rels.values():
-        if "image" in rel.target_ref:
-            image_data = rel.target_part.blob  # Retrieve image binary data
-            image = Image.open(BytesIO(image_data))
-            images.append(image)
-
-    if images:
-        image_transcriptions = process_images_concurrently(images)
-        for transcription in image_transcriptions:
-            result += f"\n[Image: {transcription}]\n"
-
-    return result
-
-def read_pdf(file):
-    """Read text and images from a PDF file."""
-    document = fitz.open(stream=file.read(), filetype="pdf")
-    result = ""
-    images = []
-
-    for page_num in range(len(document)):
-        page = document.load_page(page_num)
-        page_text = page.get_text()
-        result += f"\nPage {page_num + 1}\n{page_text}"
-
-        page_images = []
-        for img in page.get_images(full=True):
-            xref = img[0]
-            base_image = document.extract_image(xref)
-            image = Image.open(BytesIO(base_image["image"]))
-            page_images.append(image)
-
-        if page_images:
-            image_transcriptions = process_images_concurrently(page_images)
-            for transcription in image_transcriptions:
-                result += f"\n[Image on page {page_num + 1}: {transcription}]\n"
-
-    return result
-
-def read_pptx(file):
-    """Read text and images from a PowerPoint file."""
-    presentation = Presentation(file)
-    result = ""
-
-    for slide_num, slide in enumerate(presentation.slides, start=1):
-        slide_text = ""
-        images = []
-
-        for shape in slide.shapes:
-            if hasattr(shape, "text"):
-                slide_text += shape.text + "\n"
-
-            # Ensure to correctly handle image shapes
-            if hasattr(shape, "image"):
-                image = shape.image
-                image_stream = image.blob  # Retrieve image binary data
-                image = Image.open(BytesIO(image_stream))
-                images.append(image)
-
-        result += f"Slide {slide_num}:\n{slide_text}"
-
-        if images:
-            image_transcriptions = process_images_concurrently(images)
-            for transcription in image_transcriptions:
-                result += f"\n[Image: {transcription}]\n"
-
-    return result
-
-def read_txt(file):
-    """Read text from a TXT file."""
-    return file.read().decode("utf-8")
-
-def read_excel(file):
-    """Read text and images from an Excel file."""
-    wb = openpyxl.load_workbook(file)
-    result = ""
-    images = []
-
-    for sheet in wb.sheetnames:
-        ws = wb[sheet]
-        result += f"Sheet: {sheet}\n"
-
-        # Reading text content
-        for row in ws.iter_rows(values_only=True):
-            result += "\t".join([str(cell) if cell is not None else "" for cell in row]) + "\n"
-
-        # Reading images
-        for img in ws._images:
-            img_stream = img._data()  # Retrieve image binary data
-            image = Image.open(BytesIO(img_stream))
-            images.append(image)
-
-    if images:
-        image_transcriptions = process_images_concurrently(images)
-        for transcription in image_transcriptions:
-            result += f"\n[Image: {transcription}]\n"
-
-    return result
+from openai_gateway import GatewayError
+from pipeline import (
+    configure_gateway, extract_action_items, generate_drafts, generate_sections, plan_ingestion,
+    process_files_concurrently, save_as_docx, transcription_cache,
+)
+from tracing import summarize_spans, tracer
+
+# pandas, st_aggrid and streamlit_quill are imported inside the panels that
+# use them, so a rerun that never reaches those panels does not pay for them.
+
+@st.cache_resource
+def get_model_gateway():
+    """Create the model gateway once per server process rather than on every rerun."""
+    return configure_gateway(st.secrets["OPENAI_API_KEY"])
+
+
+def content_hash(*values):
+    """Return a stable hash of JSON-serializable values, used as a memo fingerprint."""
+    return hashlib.sha256(json.dumps(values, sort_keys=True, default=str).encode()).hexdigest()
+
+def memoize(name, fingerprint, compute):
+    """Return a value memoized in the session, recomputing it only when its fingerprint changes.
+
+    Streamlit reruns the whole script on every interaction; this keeps
+    expensive derived values (DOCX bytes, the action-item grid) across reruns
+    and invalidates them as soon as their inputs change.
+    """
+    memo = st.session_state.setdefault("memo", {})
+    entry = memo.get(name)
+    if entry is None or entry[0] != fingerprint:
+        entry = (fingerprint, compute())
+        memo[name] = entry
+    return entry[1]
+
+def structured_action_items(action_items):
+    """Return the generated action items as structured dicts, memoized only when the model produced them.
+
+    Line-parsed items from a fallback are shown with a warning but not kept,
+    so the next rerun tries the model again.
+    """
+    fingerprint = content_hash(content_hash(st.session_state.transcription), action_items)
+    memo = st.session_state.setdefault("memo", {})
+    entry = memo.get("action_items")
+    if entry is not None and entry[0] == fingerprint:
+        return entry[1]
+    try:
+        items, structured = extract_action_items(st.session_state.transcription, action_items)
+    except GatewayError as e:
+        st.warning(f"Could not extract action items ({e}); they are split line by line until a retry succeeds.")
+        return parse_action_items(action_items)
+    if not structured:
+        st.warning("The model could not return structured action items, so they are split line by line; owners and due dates may be missing.")
+        return items
+    memo["action_items"] = (fingerprint, items)
+    return items
+
+def generation_fingerprint():
+    """Fingerprint the inputs of generated output: the edited transcription and the GPT task prompts."""
+    return content_hash(st.session_state.transcription, st.session_state.prompts)
+
+# Grid checkbox column for each kind of draft
+DRAFT_COLUMNS = {"email": "Draft Email", "slack": "Draft Slack", "memo": "Draft Memo"}
+
+def build_action_items_grid(items):
+    """Build the AgGrid DataFrame and grid options for structured action items."""
+    import pandas as pd
+    from st_aggrid import GridOptionsBuilder
+
+    grid_df = pd.DataFrame({
+        "Task Number": range(1, len(items) + 1),
+        "Task": [item["task"] for item in items],
+        "Owner": [item.get("owner") or "" for item in items],
+        "Due Date": [item.get("due_date") or "" for item in items],
+        "Subtasks": ["; ".join(item.get("subtasks") or []) for item in items],
+        **{column: False for column in DRAFT_COLUMNS.values()},
+    })
+
+    gb = GridOptionsBuilder.from_dataframe(grid_df)
+    for column in DRAFT_COLUMNS.values():
+        gb.configure_column(column, editable=True, cellEditor="agCheckboxCellEditor")
+    gb.configure_pagination()
+    gb.configure_default_column(editable=True, resizable=True)
+    grid_options = gb.build()
+    return grid_df, grid_options
+
+def draft_key(transcript_hash, kind, item):
+    """Key a draft by its transcript, kind and action item, so each row's drafts are generated once."""
+    return content_hash(transcript_hash, kind, item)
+
+
+def show_timings():
+    """Show where time went in each traced run of this session, stage by stage."""
+    with st.expander("Timing", expanded=False):
+        for run, rows in st.session_state.timings.items():
+            st.write(f"**{run}**")
+            st.dataframe(rows, hide_index=True, use_container_width=True)
+        st.write("**All sessions since the server started**")
+        st.code(tracer.prometheus(), language="text")
 
 
 def main():
+    get_model_gateway()
+    # Files still running when a previous run was interrupted may have offloaded work since; drop it
+    session_id = st.session_state.setdefault("session_id", uuid.uuid4().hex)
+    offload_pool.cancel(session_id)
     st.markdown(
         """
         <style>
@@ -241,75 +132,62 @@ def main():
     st.sidebar.info("Upload mp3, mp4, mov, docx, txt, xlsx, pdf, pptx, or image files to start!")
     uploaded_files = st.sidebar.file_uploader("Upload audio, video, text, or image files", type=["mp3", "mp4", "mov", "docx", "txt", "xlsx", "pdf", "pptx", "jpg", "jpeg", "png"], accept_multiple_files=True)
     process_files = st.sidebar.button("Process Files")
+    show_timing = st.sidebar.checkbox("Show timing", value=False)
+    st.session_state.setdefault("timings", {})
 
     if uploaded_files and process_files:
-        st.session_state.setdefault('transcriptions', [])
-        progress_bar = st.progress(0)
-        total_files = len(uploaded_files)
-
+        progress_bar = st.progress(0.0)
         status_placeholder = st.empty()
 
-        # Stage 1: Files Uploaded
-        status_placeholder.info("Files uploaded successfully!")
-        progress_bar.progress(0.1)
-
-        # Initial processing stage
-        for i, uploaded_file in enumerate(uploaded_files):
-            with status_placeholder.container():
-                status_placeholder.info(f"Processing {uploaded_file.name} ({i + 1}/{total_files})...")
-
-            with st.spinner(f"Processing {uploaded_file.name}..."):
-                # Handle different file types and process accordingly
-                if uploaded_file.type in ["video/quicktime", "video/mp4"]:
-                    status_placeholder.info("Converting video to audio...")
-                    progress_bar.progress(0.2)
-                    audio_file_path = convert_video_to_mp3(uploaded_file, ".mov" if uploaded_file.type == "video/quicktime" else ".mp4")
-                    if audio_file_path:
-                        with open(audio_file_path, "rb") as f:
-                            status_placeholder.info("Transcribing audio...")
-                            progress_bar.progress(0.5)
-                            st.session_state.transcriptions.append(transcribe_audio(f))
-                elif uploaded_file.type == "audio/mpeg":
-                    status_placeholder.info("Transcribing audio file...")
-                    progress_bar.progress(0.5)
-                    st.session_state.transcriptions.append(transcribe_audio(uploaded_file))
-                elif uploaded_file.type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document":
-                    status_placeholder.info("Reading DOCX file...")
-                    progress_bar.progress(0.2)
-                    st.session_state.transcriptions.append(read_docx(uploaded_file))
-                elif uploaded_file.type == "text/plain":
-                    status_placeholder.info("Reading TXT file...")
-                    progress_bar.progress(0.2)
-                    st.session_state.transcriptions.append(read_txt(uploaded_file))
-                elif uploaded_file.type == "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet":
-                    status_placeholder.info("Reading Excel file...")
-                    progress_bar.progress(0.2)
-                    st.session_state.transcriptions.append(read_excel(uploaded_file))
-                elif uploaded_file.type == "application/pdf":
-                    status_placeholder.info("Reading PDF file...")
-                    progress_bar.progress(0.2)
-                    st.session_state.transcriptions.append(read_pdf(uploaded_file))
-                elif uploaded_file.type == "application/vnd.openxmlformats-officedocument.presentationml.presentation":
-                    status_placeholder.info("Reading PowerPoint file...")
-                    progress_bar.progress(0.2)
-                    st.session_state.transcriptions.append(read_pptx(uploaded_file))
-                elif uploaded_file.type in ["image/jpeg", "image/png"]:
-                    status_placeholder.info("Transcribing image...")
-                    progress_bar.progress(0.5)
-                    st.session_state.transcriptions.append(transcribe_image(Image.open(uploaded_file)))
-
-            # Update the progress bar after processing each file
-            progress_bar.progress(0.2 + (0.7 * (i + 1) / total_files))
-
-        # Stage 3: Processing Complete
+        # Only new or changed content is read; files removed from the uploader are forgotten
+        parsed_files = st.session_state.setdefault("parsed_files", {})
+        digests, pending = plan_ingestion(uploaded_files, parsed_files)
+
+        # Progress is the share of pending bytes whose files have finished
+        total_bytes = sum(f.size for _, f in pending) or 1
+        done_bytes = 0
+
+        def report_progress(uploaded_file, completed, total, error):
+            nonlocal done_bytes
+            done_bytes += uploaded_file.size
+            if error:
+                st.error(f"Failed to process {uploaded_file.name}: {error}")
+            else:
+                status_placeholder.info(f"Processed {uploaded_file.name} ({completed}/{total})")
+            progress_bar.progress(min(1.0, done_bytes / total_bytes), text=f"{done_bytes / 1_000_000:.1f} of {total_bytes / 1_000_000:.1f} MB processed")
+
+        status_placeholder.info(f"Processing {len(pending)} new of {len(digests)} files...")
+        with st.spinner(f"Processing {len(pending)} files..."), tracer.collect() as spans, offload_session(session_id):
+            try:
+                results = process_files_concurrently([f for _, f in pending], on_progress=report_progress) if pending else []
+            finally:
+                # A rerun or stop interrupts the script here; cancel the offloaded work it was waiting on
+                offload_pool.cancel(session_id)
+        if spans:
+            st.session_state.timings["Process Files"] = summarize_spans(spans)
+        for (digest, _), result in zip(pending, results):
+            if result is not None:
+                parsed_files[digest] = result
+        st.session_state.transcriptions = [parsed_files[digest] for digest in digests if digest in parsed_files]
+
         status_placeholder.success("All files processed successfully!")
         progress_bar.progress(1.0)
 
-        if st.session_state.transcriptions:
-            st.session_state.transcription = "\n\n".join(st.session_state.transcriptions)
+        cache_stats = transcription_cache.stats()
+        st.sidebar.caption(
+            f"Transcription cache, all sessions since the server started: {cache_stats['hits']} hits, {cache_stats['misses']} misses, "
+            f"{cache_stats['bytes_saved'] / 1_000_000:.1f} MB not re-sent"
+        )
+
+        # Rebuild the transcription only when the document set changed, so edits survive a no-op click
+        joined = "\n\n".join(st.session_state.transcriptions)
+        if joined and joined != st.session_state.get("ingested_transcription"):
+            st.session_state.transcription = st.session_state.ingested_transcription = joined
 
     if "transcription" in st.session_state:
         with st.expander("Transcription", expanded=True):
+            from streamlit_quill import st_quill
+
             st.subheader("Transcription")
             st.session_state.transcription = st_quill(value=st.session_state.transcription, key='transcription_editor')
 
@@ -357,16 +235,52 @@ def main():
                 """, unsafe_allow_html=True
             )
             if st.button("Generate", key="generate"):
-                minutes = {prompt_info["heading"]: generate_response(st.session_state.transcription, prompt_info["model"], prompt_info["prompt"]) for prompt_info in st.session_state.prompts}
-                st.session_state.generated_minutes = minutes
+                # Stream every section into its own placeholder while they generate side by side
+                live_output = st.empty()
+                with live_output.container():
+                    generation_progress = st.progress(0.0, text="Generating sections...")
+                    placeholders = []
+                    for prompt_info in st.session_state.prompts:
+                        st.write(f"**{prompt_info['heading']}**")
+                        placeholders.append(st.empty())
+                with tracer.collect() as spans:
+                    outputs, metrics, generation_stats = generate_sections(
+                        st.session_state.transcription, st.session_state.prompts,
+                        on_update=lambda index, text: placeholders[index].markdown(text),
+                        on_progress=lambda completed, total: generation_progress.progress(completed / total, text=f"{completed} of {total} sections generated"),
+                    )
+                st.session_state.timings["Generate"] = summarize_spans(spans)
+                live_output.empty()
+                st.session_state.generated_minutes = {prompt_info["heading"]: output for prompt_info, output in zip(st.session_state.prompts, outputs)}
+                st.session_state.generation_metrics = metrics
+                st.session_state.generation_stats = generation_stats
+                st.session_state.generated_fingerprint = generation_fingerprint()
 
         if 'generated_minutes' in st.session_state:
+            if st.session_state.get("generated_fingerprint") != generation_fingerprint():
+                st.warning("The transcription or GPT tasks changed since this document was generated. Click generate to refresh it.")
             with st.expander("Generated Minutes", expanded=True):
                 for key, value in st.session_state.generated_minutes.items():
                     st.write(f"**{key}**")
                     st.write(value)
 
-                docx_file = save_as_docx(st.session_state.generated_minutes)
+                if "generation_metrics" in st.session_state:
+                    st.caption(" · ".join(
+                        f"{m['heading']}: first token {m['time_to_first_token'] or 0:.1f}s, total {m['total_latency']:.1f}s"
+                        for m in st.session_state.generation_metrics
+                    ))
+                if "generation_stats" in st.session_state:
+                    stats = st.session_state.generation_stats
+                    st.caption(
+                        f"Prompt cache: {stats['cached_token_ratio']:.0%} of {stats['prompt_tokens']:,} prompt tokens cached · "
+                        f"{stats['memo_hits']} responses reused, ~{stats['saved_seconds']:.1f}s saved"
+                    )
+
+                minutes = st.session_state.generated_minutes
+                with tracer.collect() as spans:
+                    docx_file = memoize("minutes_docx", content_hash(minutes), lambda: save_as_docx(minutes).getvalue())
+                if spans:
+                    st.session_state.timings["DOCX"] = summarize_spans(spans)
 
                 st.info("Click download to get a docx file of your document!")
                 st.download_button(
@@ -378,58 +292,51 @@ def main():
 
             if "Action Items" in st.session_state.generated_minutes:
                 with st.expander("Action Items", expanded=True):
+                    import pandas as pd
+                    from st_aggrid import AgGrid, GridUpdateMode
+
                     st.subheader("Action Items")
                     action_items = st.session_state.generated_minutes["Action Items"]
+                    # Owners and due dates are filled in from the transcript, so a new transcript re-extracts
+                    items = structured_action_items(action_items)
                     st.info("Check boxes to generate documents from tasks!")
-                    action_items_list = [item for item in action_items.split('\n') if item]
-
-                    action_items_dict = {}
-                    parent_task = None
-
-                    for item in action_items_list:
-                        if item.startswith("    "):
-                            if parent_task:
-                                action_items_dict[parent_task].append(item.strip())
-                        else:
-                            parent_task = item.strip()
-                            action_items_dict[parent_task] = []
-
-                    grid_df = pd.DataFrame({
-                        "Task Number": range(1, len(action_items_dict) + 1),
-                        "Task": list(action_items_dict.keys()),
-                        "Draft Email": False,
-                        "Draft Slack": False,
-                        "Draft Memo": False
-                    })
-
-                    gb = GridOptionsBuilder.from_dataframe(grid_df)
-                    gb.configure_column("Draft Email", editable=True, cellEditor="agCheckboxCellEditor")
-                    gb.configure_column("Draft Slack", editable=True, cellEditor="agCheckboxCellEditor")
-                    gb.configure_column("Draft Memo", editable=True, cellEditor="agCheckboxCellEditor")
-                    gb.configure_pagination()
-                    gb.configure_default_column(editable=True, resizable=True)
-                    grid_options = gb.build()
+                    grid_df, grid_options = memoize("action_items_grid", content_hash(items), lambda: build_action_items_grid(items))
 
                     grid_response = AgGrid(grid_df, gridOptions=grid_options, height=300, fit_columns_on_grid_load=True, update_mode=GridUpdateMode.MODEL_CHANGED)
 
+                    # Edits made in the grid flow into the drafts
+                    selected = []
                     if isinstance(grid_response['data'], pd.DataFrame):
                         for _, row in grid_response['data'].iterrows():
-                            task_num = row['Task Number']
-                            if row["Draft Email"]:
-                                st.session_state[f"email_prompt_{task_num}"] = f"Draft an email for the following action item: {row['Task']}"
-                            if row["Draft Slack"]:
-                                st.session_state[f"slack_prompt_{task_num}"] = f"Draft a Slack message for the following action item: {row['Task']}"
-                            if row["Draft Memo"]:
-                                st.session_state[f"memo_prompt_{task_num}"] = f"Draft a memo for the following action item: {row['Task']}"
-
-                    for key, value in st.session_state.items():
-                        if key.startswith("email_prompt_") or key.startswith("slack_prompt_") or key.startswith("memo_prompt_"):
-                            task_num = key.split('_')[-1]
-                            st.subheader(f"{key.split('_')[0].capitalize()} Draft for Task {task_num}")
-                            st.write(value)
-                            if st.button(f"Generate {key.split('_')[0].capitalize()} for Task {task_num}"):
-                                draft = generate_response(st.session_state.transcription, "gpt-4o-mini", value)
-                                st.write(draft)
+                            item = {
+                                "task": row["Task"], "owner": row["Owner"] or None, "due_date": row["Due Date"] or None,
+                                "subtasks": [subtask.strip() for subtask in str(row["Subtasks"] or "").split(";") if subtask.strip()],
+                            }
+                            selected.extend((int(row["Task Number"]), kind, item) for kind, column in DRAFT_COLUMNS.items() if row[column])
+
+                    drafts = st.session_state.setdefault("drafts", {})
+                    transcript_hash = content_hash(st.session_state.transcription)
+                    missing = [(kind, item) for _, kind, item in selected if draft_key(transcript_hash, kind, item) not in drafts]
+                    if missing and st.button(f"Generate {len(missing)} Drafts"):
+                        draft_progress = st.progress(0.0, text="Generating drafts...")
+                        with tracer.collect() as spans:
+                            texts = generate_drafts(
+                                st.session_state.transcription, missing,
+                                on_progress=lambda completed, total: draft_progress.progress(completed / total, text=f"{completed} of {total} drafts generated"),
+                            )
+                        st.session_state.timings["Drafts"] = summarize_spans(spans)
+                        for (kind, item), text in zip(missing, texts):
+                            drafts[draft_key(transcript_hash, kind, item)] = text
+                        draft_progress.empty()
+
+                    for task_num, kind, item in selected:
+                        draft = drafts.get(draft_key(transcript_hash, kind, item))
+                        if draft is not None:
+                            st.subheader(f"{kind.capitalize()} Draft for Task {task_num}")
+                            st.write(draft)
+
+    if show_timing and st.session_state.timings:
+        show_timings()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,199 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from tracing import propagate, span
+
+# Context window, in tokens, by model family; a model name matches its longest prefix here,
+# so dated snapshots and variants such as gpt-4o-2024-08-06 or gpt-4.1-mini share their family's window
+CONTEXT_WINDOWS = {
+    "gpt-5": 400000,
+    "gpt-4.1": 1047576,
+    "gpt-4o": 128000,
+    "gpt-4-turbo": 128000,
+    "gpt-4-1106": 128000,
+    "gpt-4-0125": 128000,
+    "gpt-4-32k": 32768,
+    "gpt-4": 8192,
+    "gpt-3.5-turbo": 16385,
+    "o1-mini": 128000,
+    "o1": 200000,
+    "o3": 200000,
+    "o4-mini": 200000,
+}
+# For names no family matches
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# Tokens kept free in every request for the model's answer
+RESPONSE_TOKEN_RESERVE = 4096
+
+# Map chunks are kept well below the context window so each map call stays fast
+MAP_CHUNK_TOKENS = int(os.getenv("MAP_CHUNK_TOKENS", "12000"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "200"))
+MAX_MAP_WORKERS = int(os.getenv("MAX_MAP_WORKERS", "8"))
+
+# Appended to the task prompt, which is sent after the text it applies to
+MAP_INSTRUCTION = (
+    "The text in the previous message is part {index} of {total} of a longer transcript; neighbouring parts overlap slightly. "
+    "Apply the instructions above to that part only. The results for all parts will be combined afterwards."
+)
+REDUCE_INSTRUCTION = (
+    "The text in the previous message contains results produced separately for consecutive parts of one transcript. "
+    "Following the instructions above, combine them into a single response covering the whole transcript, "
+    "merging duplicates and keeping the original order."
+)
+
+
+class GenerationStats:
+    """Thread-safe tally of prompt-cache usage and memoized responses for one generation run."""
+
+    def __init__(self):
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.completion_tokens = 0
+        self.memo_hits = 0
+        self.saved_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record_usage(self, usage):
+        """Add the usage dict reported by one chat completion."""
+        if usage is None:
+            return
+        details = usage.get("prompt_tokens_details") or {}
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += usage.get("prompt_tokens") or 0
+            self.completion_tokens += usage.get("completion_tokens") or 0
+            self.cached_tokens += details.get("cached_tokens") or 0
+
+    def record_memo_hit(self, latency):
+        """Count a response served from the local memo instead of the API."""
+        with self._lock:
+            self.memo_hits += 1
+            self.saved_seconds += latency
+
+    def summary(self):
+        """Return the run's totals, including the share of prompt tokens served from cache."""
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "prompt_tokens": self.prompt_tokens,
+                "cached_tokens": self.cached_tokens,
+                "cached_token_ratio": self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0,
+                "completion_tokens": self.completion_tokens,
+                "memo_hits": self.memo_hits,
+                "saved_seconds": self.saved_seconds,
+            }
+
+
+def encoding_for(model):
+    """Return the tiktoken encoding used by a model."""
+    import tiktoken
+
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text, model):
+    """Count the tokens text occupies for a model."""
+    return len(encoding_for(model).encode(text, disallowed_special=()))
+
+
+def context_window(model):
+    """Return the context window of a model, in tokens, from its family's entry in CONTEXT_WINDOWS.
+
+    Fine-tuned models ("ft:<base model>:...") use their base model's window.
+    """
+    name = model.removeprefix("ft:")
+    families = [family for family in CONTEXT_WINDOWS if name.startswith(family)]
+    return CONTEXT_WINDOWS[max(families, key=len)] if families else DEFAULT_CONTEXT_WINDOW
+
+
+def input_budget(model, custom_prompt):
+    """Return how many transcript tokens fit in one request alongside the prompt."""
+    return context_window(model) - RESPONSE_TOKEN_RESERVE - count_tokens(custom_prompt, model) - 100
+
+
+def truncate_tokens(text, model, max_tokens):
+    """Return text cut down to at most max_tokens tokens."""
+    encoding = encoding_for(model)
+    tokens = encoding.encode(text, disallowed_special=())
+    return text if len(tokens) <= max_tokens else encoding.decode(tokens[:max_tokens])
+
+
+def split_tokens(text, model, chunk_tokens, overlap_tokens=CHUNK_OVERLAP_TOKENS):
+    """Split text into chunks of at most chunk_tokens tokens that overlap by overlap_tokens."""
+    encoding = encoding_for(model)
+    tokens = encoding.encode(text, disallowed_special=())
+    step = max(1, chunk_tokens - overlap_tokens)
+    return [encoding.decode(tokens[start:start + chunk_tokens]) for start in range(0, max(1, len(tokens) - overlap_tokens), step)]
+
+
+def choose_strategy(transcription, model, custom_prompt):
+    """Return "single" if the transcript fits in one request, otherwise "map_reduce"."""
+    if count_tokens(transcription, model) <= input_budget(model, custom_prompt):
+        return "single"
+    return "map_reduce"
+
+
+def summarize(transcription, model, custom_prompt, complete, on_delta=None, max_workers=MAX_MAP_WORKERS):
+    """Run a prompt over a transcript of any length.
+
+    complete(text, model, prompt, on_delta=None) performs one model call,
+    streaming tokens to on_delta when given. Transcripts that fit the model's
+    context window are sent in a single call; longer ones are split into
+    overlapping chunks, the prompt is mapped over the chunks concurrently and
+    the partial results are reduced into one answer. Only the final call streams.
+    """
+    strategy = choose_strategy(transcription, model, custom_prompt)
+    with span("summarize", model=model, strategy=strategy) as s:
+        if strategy == "single":
+            return complete(transcription, model, custom_prompt, on_delta=on_delta)
+
+        chunk_tokens = min(MAP_CHUNK_TOKENS, input_budget(model, custom_prompt))
+        chunks = split_tokens(transcription, model, chunk_tokens)
+        s.set(chunks=len(chunks))
+        map_prompts = [
+            f"{custom_prompt}\n\n{MAP_INSTRUCTION.format(index=index, total=len(chunks))}"
+            for index in range(1, len(chunks) + 1)
+        ]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            partials = list(executor.map(propagate(lambda chunk, prompt: complete(chunk, model, prompt)), chunks, map_prompts))
+        return reduce_partials(partials, model, custom_prompt, complete, on_delta, max_workers)
+
+
+def reduce_partials(partials, model, custom_prompt, complete, on_delta=None, max_workers=MAX_MAP_WORKERS):
+    """Combine partial results into one, reducing in rounds if they do not fit a single request.
+
+    Partials too large to pair up within one request are truncated, since a
+    round that cannot merge any of them would never shrink the set.
+    """
+    reduce_prompt = f"{custom_prompt}\n\n{REDUCE_INSTRUCTION}"
+    budget = input_budget(model, reduce_prompt)
+    # Each partial's share of a request when truncated to fit two per group, allowing for its "Part N:" header
+    pair_tokens = budget // 2 - 20
+
+    while True:
+        groups = [[]]
+        group_tokens = 0
+        for index, partial in enumerate(partials, start=1):
+            section = f"Part {index}:\n{partial}"
+            tokens = count_tokens(section, model)
+            if groups[-1] and group_tokens + tokens > budget:
+                groups.append([])
+                group_tokens = 0
+            groups[-1].append(section)
+            group_tokens += tokens
+
+        if len(groups) == 1:
+            return complete("\n\n".join(groups[0]), model, reduce_prompt, on_delta=on_delta)
+        if len(groups) >= len(partials):
+            if pair_tokens <= 0:
+                raise ValueError(f"The context window of {model} is too small to combine {len(partials)} partial results")
+            partials = [truncate_tokens(partial, model, pair_tokens) for partial in partials]
+            continue
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            partials = list(executor.map(propagate(lambda group: complete("\n\n".join(group), model, reduce_prompt)), groups))
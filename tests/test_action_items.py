@@ -0,0 +1,27 @@
+from action_items import describe_item, draft_prompt, parse_action_items
+
+
+def test_bullets_become_items_and_indented_lines_subtasks():
+    text = (
+        "- Send the budget to finance\n"
+        "  - Check Q3 numbers\n"
+        "  * Attach receipts\n"
+        "\n"
+        "2. Book the offsite venue\n"
+        "3) Review the hiring plan\n"
+    )
+    assert parse_action_items(text) == [
+        {"task": "Send the budget to finance", "owner": None, "due_date": None, "subtasks": ["Check Q3 numbers", "Attach receipts"]},
+        {"task": "Book the offsite venue", "owner": None, "due_date": None, "subtasks": []},
+        {"task": "Review the hiring plan", "owner": None, "due_date": None, "subtasks": []},
+    ]
+
+
+def test_indented_lines_before_any_item_start_one():
+    assert [item["task"] for item in parse_action_items("  - Orphan step\n- Task")] == ["Orphan step", "Task"]
+
+
+def test_draft_prompt_includes_owner_due_date_and_subtasks():
+    item = {"task": "Ship the report.", "owner": "Dana", "due_date": "2024-05-01", "subtasks": ["Proofread", "Export PDF"]}
+    assert describe_item(item) == "Ship the report. Owner: Dana. Due: 2024-05-01. Subtasks: Proofread; Export PDF."
+    assert draft_prompt("slack", item).startswith("Draft a Slack message for the following action item: Ship the report.")
@@ -0,0 +1,47 @@
+import pytest
+
+from audio_processing import Segment, plan_chunks, stitch_segments
+
+
+def test_short_recording_is_one_chunk():
+    chunks = plan_chunks(300, [], chunk_seconds=600, overlap_seconds=5)
+    assert len(chunks) == 1
+    assert (chunks[0].start, chunks[0].end, chunks[0].own_start, chunks[0].own_end) == (0.0, 300, 0.0, 300)
+
+
+def test_boundaries_snap_to_the_latest_silence_before_the_target():
+    silences = [(540.0, 542.0), (590.0, 592.0), (1300.0, 1302.0)]
+    chunks = plan_chunks(1500, silences, chunk_seconds=600, overlap_seconds=5)
+    assert [(c.own_start, c.own_end) for c in chunks] == [(0.0, 591.0), (591.0, 1191.0), (1191.0, 1500)]
+    assert chunks[1].start == pytest.approx(586.0)
+    assert chunks[1].end == pytest.approx(1196.0)
+    assert chunks[-1].end == 1500
+
+
+def test_chunks_cover_the_recording_without_gaps():
+    chunks = plan_chunks(3601, [], chunk_seconds=600, overlap_seconds=5)
+    assert chunks[0].own_start == 0.0
+    assert chunks[-1].own_end == 3601
+    assert all(a.own_end == b.own_start for a, b in zip(chunks, chunks[1:]))
+    assert all(c.own_end - c.own_start <= 600 for c in chunks)
+
+
+def test_stitch_drops_words_repeated_across_a_boundary():
+    first = [Segment(0, 5, "We agreed to ship the launch plan on Friday")]
+    second = [Segment(5, 8, "the launch plan on Friday and review it Monday"), Segment(8, 10, "Next topic")]
+    stitched = stitch_segments([first, second])
+    assert [s.text for s in stitched] == [
+        "We agreed to ship the launch plan on Friday",
+        "and review it Monday",
+        "Next topic",
+    ]
+
+
+def test_stitch_keeps_short_coincidental_overlaps():
+    stitched = stitch_segments([[Segment(0, 1, "yes it is")], [Segment(1, 2, "it is fine")]])
+    assert stitched[1].text == "it is fine"
+
+
+def test_stitch_drops_segments_that_were_entirely_repeated():
+    stitched = stitch_segments([[Segment(0, 1, "one two three four")], [Segment(1, 2, "two three four"), Segment(2, 3, "five")]])
+    assert [s.text for s in stitched] == ["one two three four", "five"]
@@ -0,0 +1,114 @@
+import threading
+from concurrent.futures import Future
+
+from image_dedup import ImageDeduplicator
+
+
+class Recorder:
+    """Stands in for the image scheduler, recording what was submitted."""
+
+    def __init__(self):
+        self.submitted = []
+
+    def __call__(self, data):
+        self.submitted.append(data)
+        future = Future()
+        future.set_result(f"description {len(self.submitted)}")
+        return future
+
+
+def fingerprints(table):
+    return lambda data: table[bytes(data)]
+
+
+def test_identical_bytes_are_described_once():
+    submit = Recorder()
+    images = ImageDeduplicator(submit, fingerprints({b"logo": ((100, 100), 0b1010)}))
+    first = images.queue(b"logo")
+    second = images.queue(b"logo")
+    assert first is second
+    assert submit.submitted == [b"logo"]
+    assert (images.unique, images.duplicates) == (1, 1)
+
+
+def test_repeated_xref_skips_fingerprinting():
+    calls = []
+
+    def fingerprint(data):
+        calls.append(data)
+        return (100, 100), 1
+
+    images = ImageDeduplicator(Recorder(), fingerprint)
+    first = images.queue(b"page image", xref=7)
+    assert images.queue(b"page image re-extracted", xref=7) is first
+    assert calls == [b"page image"]
+
+
+def test_near_identical_perceptual_hashes_share_a_description():
+    submit = Recorder()
+    images = ImageDeduplicator(submit, fingerprints({
+        b"logo.png": ((200, 80), 0b1111_0000),
+        b"logo.jpg": ((200, 80), 0b1111_0001),
+        b"chart": ((200, 80), 0b0000_1111_0000_1111_0000),
+    }), max_distance=2)
+    assert images.queue(b"logo.png") is images.queue(b"logo.jpg")
+    assert images.queue(b"chart") is not None
+    assert submit.submitted == [b"logo.png", b"chart"]
+
+
+def test_small_images_are_skipped():
+    submit = Recorder()
+    images = ImageDeduplicator(submit, fingerprints({b"bullet": ((16, 16), 3)}), min_side=48)
+    assert images.queue(b"bullet") is None
+    assert submit.submitted == []
+    assert images.skipped == 1
+
+
+def test_queue_blocks_while_too_many_images_are_pending():
+    futures = []
+
+    def submit(data):
+        futures.append(Future())
+        return futures[-1]
+
+    images = ImageDeduplicator(submit, fingerprints({
+        b"one": ((100, 100), 0), b"two": ((100, 100), 0xFFFF_FFFF_0000_0000), b"three": ((100, 100), 0x0000_0000_FFFF_FFFF),
+    }), max_pending=2)
+    images.queue(b"one")
+    images.queue(b"two")
+    third = threading.Thread(target=images.queue, args=(b"three",))
+    third.start()
+    third.join(0.1)
+    assert third.is_alive() and len(futures) == 2
+    futures[0].set_result("described")
+    third.join(1)
+    assert not third.is_alive() and len(futures) == 3
+
+
+def test_similar_hashes_with_different_shapes_are_described_separately():
+    submit = Recorder()
+    images = ImageDeduplicator(submit, fingerprints({
+        b"screenshot": ((800, 600), 0b1000),
+        b"banner": ((1200, 100), 0b1001),
+        b"screenshot small": ((400, 301), 0b1000),
+    }), max_distance=2)
+    first = images.queue(b"screenshot")
+    assert images.queue(b"banner") is not first
+    assert images.queue(b"screenshot small") is first
+    assert submit.submitted == [b"screenshot", b"banner"]
+
+
+def test_repeated_small_images_are_fingerprinted_once():
+    calls = []
+
+    def fingerprint(data):
+        calls.append(data)
+        return (16, 16), 3
+
+    images = ImageDeduplicator(Recorder(), fingerprint, min_side=48)
+    assert images.queue(b"bullet") is None
+    assert images.queue(b"bullet") is None
+    assert images.queue(b"bullet re-encoded", xref=4) is None
+    assert images.queue(b"bullet re-encoded again", xref=4) is None
+    assert calls == [b"bullet", b"bullet re-encoded"]
+    assert images.skipped == 4
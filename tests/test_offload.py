@@ -0,0 +1,36 @@
+import time
+from concurrent.futures import CancelledError
+
+import pytest
+
+from offload import OffloadPool, session
+
+
+@pytest.fixture
+def pool():
+    pool = OffloadPool(max_workers=1)
+    yield pool
+    pool.shutdown()
+
+
+def test_jobs_belong_to_the_submitting_session(pool):
+    with session("a"):
+        job = pool.submit(time.sleep, 0.2)
+    other = pool.submit(time.sleep, 0, session_id="b")
+    assert pool.jobs("a") == [job]
+    assert pool.jobs("b") == [other]
+    job.result()
+    other.result()
+    assert pool.jobs("a") == pool.jobs("b") == []
+
+
+def test_cancel_drops_only_that_sessions_jobs(pool):
+    cancelled = [pool.submit(time.sleep, 0.3, session_id="a") for _ in range(4)]
+    kept = pool.submit(abs, -3, session_id="b")
+    assert pool.cancel("a") == 4
+    for job in cancelled:
+        with pytest.raises(CancelledError):
+            job.result()
+        assert job.status == "cancelled"
+    assert kept.result() == 3
+    assert pool.cancel("a") == 0
@@ -0,0 +1,121 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from openai_gateway import RateBudget, estimate_tokens
+
+
+def test_acquire_within_budget_does_not_wait():
+    budget = RateBudget(requests_per_minute=600, tokens_per_minute=60000)
+    started = time.monotonic()
+    asyncio.run(budget.acquire(1000))
+    assert time.monotonic() - started < 0.05
+
+
+def test_acquire_waits_for_tokens_to_refill():
+    budget = RateBudget(requests_per_minute=None, tokens_per_minute=600)  # 10 tokens a second
+
+    async def spend():
+        await budget.acquire(600)
+        started = time.monotonic()
+        await budget.acquire(3)
+        return time.monotonic() - started
+
+    assert asyncio.run(spend()) == pytest.approx(0.3, abs=0.1)
+
+
+def test_requests_larger_than_capacity_are_capped():
+    budget = RateBudget(requests_per_minute=None, tokens_per_minute=600)
+    started = time.monotonic()
+    asyncio.run(budget.acquire(10_000))
+    assert time.monotonic() - started < 0.05
+
+
+def test_pause_holds_back_requests():
+    budget = RateBudget(requests_per_minute=None, tokens_per_minute=None)
+    budget.pause(0.2)
+    started = time.monotonic()
+    asyncio.run(budget.acquire(1))
+    assert time.monotonic() - started >= 0.19
+
+
+def test_image_parts_cost_a_fixed_amount():
+    image = {"type": "image_url", "image_url": {"url": "data:image/png;base64," + "A" * 700_000}}
+    payload = {"messages": [{"role": "user", "content": [{"type": "text", "text": "x" * 400}, image]}], "max_tokens": 300}
+    assert estimate_tokens(payload) == 100 + 1105 + 300
+
+
+PAYLOAD = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "hello"}]}
+COMPLETION = {"choices": [{"message": {"role": "assistant", "content": "hi"}}], "usage": {"prompt_tokens": 5, "completion_tokens": 1}}
+
+
+@pytest.fixture
+def fake_api():
+    """Yield make(handler) -> ModelGateway talking to handler through httpx.MockTransport, closing them afterwards."""
+    httpx = pytest.importorskip("httpx")
+    from openai_gateway import ModelGateway
+
+    gateways = []
+
+    def make(handler):
+        gateway = ModelGateway(api_key="test", transport=httpx.MockTransport(handler), base_delay=0.001, max_delay=0.01)
+        gateways.append(gateway)
+        return gateway
+
+    yield make
+    for gateway in gateways:
+        gateway.close()
+
+
+def test_transient_errors_are_retried(fake_api):
+    import httpx
+
+    statuses = iter([503, 429, 200])
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        status = next(statuses)
+        if status != 200:
+            return httpx.Response(status, json={"error": {"message": "try again"}}, headers={"retry-after-ms": "1"})
+        return httpx.Response(200, json=COMPLETION)
+
+    assert fake_api(handler).chat(PAYLOAD) == COMPLETION
+    assert len(calls) == 3
+
+
+def test_rejected_requests_are_not_retried(fake_api):
+    import httpx
+
+    from openai_gateway import GatewayError
+
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(400, json={"error": {"message": "bad schema"}})
+
+    with pytest.raises(GatewayError) as error:
+        fake_api(handler).chat(PAYLOAD)
+    assert error.value.status_code == 400
+    assert "bad schema" in str(error.value)
+    assert len(calls) == 1
+
+
+def test_identical_requests_in_flight_are_coalesced(fake_api):
+    import httpx
+
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        await asyncio.sleep(0.2)
+        return httpx.Response(200, json=COMPLETION)
+
+    gateway = fake_api(handler)
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        responses = list(executor.map(lambda _: gateway.chat(PAYLOAD), range(5)))
+    assert responses == [COMPLETION] * 5
+    assert len(calls) == 1
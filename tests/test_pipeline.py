@@ -0,0 +1,139 @@
+import argparse
+import threading
+import time
+from io import BytesIO
+
+import pytest
+
+import pipeline
+from openai_gateway import GatewayError
+from transcription_cache import TranscriptionCache
+
+
+class SlowGateway:
+    """Stands in for ModelGateway, taking long enough to build that racing threads overlap."""
+
+    created = []
+
+    def __init__(self, **options):
+        time.sleep(0.05)
+        self.closed = False
+        SlowGateway.created.append(self)
+
+    def close(self):
+        self.closed = True
+
+
+def test_concurrent_first_calls_share_one_gateway(monkeypatch):
+    monkeypatch.setattr(pipeline, "ModelGateway", SlowGateway)
+    monkeypatch.setattr(pipeline, "gateway", None)
+    monkeypatch.setattr(pipeline, "transcription_backend", None)
+    SlowGateway.created = []
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(pipeline.get_gateway())) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(SlowGateway.created) == 1
+    assert all(result is SlowGateway.created[0] for result in results)
+    assert not SlowGateway.created[0].closed
+
+
+def upload(content):
+    return BytesIO(content)
+
+
+def test_plan_ingestion_reads_only_new_content():
+    kept, changed, added = upload(b"agenda"), upload(b"notes v2"), upload(b"slides")
+    parsed = {pipeline.file_digest(kept): "agenda text", pipeline.file_digest(upload(b"notes v1")): "old notes"}
+    digests, pending = pipeline.plan_ingestion([kept, changed, added], parsed)
+    assert digests == [pipeline.file_digest(f) for f in (kept, changed, added)]
+    assert [f for _, f in pending] == [changed, added]
+    assert list(parsed) == [pipeline.file_digest(kept)]  # the replaced version is forgotten
+
+
+def test_plan_ingestion_reads_duplicate_uploads_once():
+    first, second = upload(b"same"), upload(b"same")
+    digests, pending = pipeline.plan_ingestion([first, second], {})
+    assert digests == [pipeline.file_digest(first)]
+    assert [f for _, f in pending] == [first]
+
+
+@pytest.mark.parametrize("text, page_range", [("3-7", (3, 7)), ("4", (4, 4)), ("1-1", (1, 1))])
+def test_parse_page_range(text, page_range):
+    assert pipeline.parse_page_range(text) == page_range
+
+
+@pytest.mark.parametrize("text", ["0-3", "7-3", "a-b", "3-", ""])
+def test_parse_page_range_rejects_bad_ranges(text):
+    with pytest.raises(argparse.ArgumentTypeError):
+        pipeline.parse_page_range(text)
+
+
+def test_page_numbers_clamp_to_the_document():
+    pytest.importorskip("fitz")
+    from pdf_processing import page_numbers
+
+    assert page_numbers(5) == [0, 1, 2, 3, 4]
+    assert page_numbers(5, (2, 3)) == [1, 2]
+    assert page_numbers(5, (4, 99)) == [3, 4]
+    assert page_numbers(5, (9, 12)) == []
+
+
+class FailingGateway:
+    def __init__(self, error):
+        self.error = error
+
+    def chat(self, payload):
+        raise self.error
+
+
+@pytest.fixture
+def extraction(monkeypatch, tmp_path):
+    """Isolate extract_action_items from tiktoken and the real response cache."""
+    monkeypatch.setattr(pipeline, "choose_strategy", lambda *args: "single")
+    monkeypatch.setattr(pipeline, "response_cache", TranscriptionCache(str(tmp_path)))
+
+    def use(gateway):
+        monkeypatch.setattr(pipeline, "get_gateway", lambda: gateway)
+    return use
+
+
+def test_rejected_schema_falls_back_to_the_line_parser(extraction):
+    extraction(FailingGateway(GatewayError(400, "response_format json_schema is not supported")))
+    items, structured = pipeline.extract_action_items("transcript", "- Send notes\n  - Include slides")
+    assert not structured
+    assert items == [{"task": "Send notes", "owner": None, "due_date": None, "subtasks": ["Include slides"]}]
+
+
+def test_transient_failures_are_raised_not_parsed(extraction):
+    extraction(FailingGateway(GatewayError(503, "overloaded")))
+    with pytest.raises(GatewayError):
+        pipeline.extract_action_items("transcript", "- Send notes")
+
+
+def test_local_files_are_read_from_disk(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_bytes(b"first line\n")
+    with pipeline.LocalFile(str(path)) as file:
+        assert (file.name, file.type, file.size) == (str(path), "text/plain", 11)
+        assert not hasattr(file, "getbuffer")
+        assert pipeline.file_digest(file) == pipeline.file_digest(BytesIO(b"first line\n"))
+        assert file.read() == b"first line\n"
+
+
+def test_ingest_fails_on_unreadable_files(tmp_path):
+    (tmp_path / "good.txt").write_text("agenda")
+    (tmp_path / "bad.txt").write_bytes(b"\xff\xfe\xfa")
+    paths = pipeline.list_input_files(str(tmp_path))
+    with pytest.raises(pipeline.IngestionError, match="bad.txt"):
+        pipeline.ingest(paths)
+    assert pipeline.ingest(paths, allow_partial=True) == "agenda"
+    with pytest.raises(pipeline.IngestionError):
+        pipeline.ingest([str(tmp_path / "bad.txt")], allow_partial=True)
+
+
+def test_unknown_sections_are_rejected():
+    with pytest.raises(ValueError, match="bogus"):
+        pipeline.summary_prompts("meeting_summary", ["summary", "bogus"])
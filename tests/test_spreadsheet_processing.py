@@ -0,0 +1,57 @@
+from datetime import datetime, time
+
+from spreadsheet_processing import ColumnStats, SheetSummary, sheet_text
+
+
+class FakeWorksheet:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def iter_rows(self, values_only=True):
+        return iter(self.rows)
+
+
+def test_small_sheet_prunes_empty_columns_and_compresses_empty_rows():
+    rows = [
+        (None, None),
+        ("name", "amount", None),
+        ("a", 1.0, None),
+        (None, None, None),
+        (None,),
+        ("b", 2.5),
+    ]
+    assert sheet_text(FakeWorksheet(rows)) == "name\tamount\na\t1\n[2 empty rows]\nb\t2.5\n"
+
+
+def test_single_empty_row_is_kept_as_a_blank_line():
+    rows = [("x", 1), (None,), ("y", 2)]
+    assert sheet_text(FakeWorksheet(rows)) == "x\t1\n\ny\t2\n"
+
+
+def test_large_sheet_is_summarized_and_counted():
+    rows = [("name", "amount")] + [("abc"[i % 3], i) for i in range(30)]
+    counts = {"rows": 0, "summarized_sheets": 0}
+    text = sheet_text(FakeWorksheet(rows), summary_min_rows=10, counts=counts)
+    assert text.startswith("Large table summarized: 30 data rows x 2 non-empty columns.")
+    assert "Header: name\tamount" in text
+    assert "- amount: number; 30 values; min 0, max 29, mean 14.5, sum 435" in text
+    assert "- name: text; 30 values; 3 distinct" in text
+    assert counts == {"rows": 30, "summarized_sheets": 1}
+
+
+def test_summary_of_mixed_datetime_and_time_column():
+    summary = SheetSummary(("when",), [])
+    for value in (datetime(2024, 1, 2, 9, 30), time(1, 15), datetime(2023, 5, 1), time(0, 45)):
+        summary.add((value,))
+    text = summary.render()
+    assert "from 2023-05-01 00:00:00 to 2024-01-02 09:30:00" in text
+    assert "from 00:45:00 to 01:15:00" in text
+
+
+def test_column_stats_caps_tracked_text_values(monkeypatch):
+    monkeypatch.setattr("spreadsheet_processing.MAX_TRACKED_VALUES", 2)
+    stats = ColumnStats()
+    for value in ("a", "b", "c", "a"):
+        stats.add(value)
+    assert stats.overflow
+    assert "over 2 distinct; most common: a (2)" in stats.describe("col")
@@ -0,0 +1,85 @@
+import pytest
+
+import summarization
+from summarization import split_tokens
+
+
+class CharacterEncoding:
+    """One token per character, so chunk arithmetic is easy to check."""
+
+    def encode(self, text, disallowed_special=()):
+        return list(text)
+
+    def decode(self, tokens):
+        return "".join(tokens)
+
+
+@pytest.fixture
+def characters(monkeypatch):
+    monkeypatch.setattr(summarization, "encoding_for", lambda model: CharacterEncoding())
+
+
+def test_text_shorter_than_a_chunk_is_one_chunk(characters):
+    assert split_tokens("abcdef", "gpt-4o-mini", chunk_tokens=10, overlap_tokens=2) == ["abcdef"]
+
+
+def test_chunks_overlap_and_cover_the_text(characters):
+    text = "abcdefghijklmnopqrstuvwxyz"
+    chunks = split_tokens(text, "gpt-4o-mini", chunk_tokens=10, overlap_tokens=3)
+    assert chunks == ["abcdefghij", "hijklmnopq", "opqrstuvwx", "vwxyz"]
+    assert all(len(chunk) <= 10 for chunk in chunks)
+    assert all(a[-3:] == b[:3] for a, b in zip(chunks, chunks[1:]))
+
+
+def test_no_chunk_is_only_overlap(characters):
+    chunks = split_tokens("a" * 20, "gpt-4o-mini", chunk_tokens=10, overlap_tokens=2)
+    assert [len(chunk) for chunk in chunks] == [10, 10, 4]
+
+
+def test_empty_text_gives_one_empty_chunk(characters):
+    assert split_tokens("", "gpt-4o-mini", chunk_tokens=10, overlap_tokens=2) == [""]
+
+
+def test_split_with_real_encoding():
+    pytest.importorskip("tiktoken")
+    text = " ".join(f"word{i}" for i in range(5000))
+    chunks = split_tokens(text, "gpt-4o-mini", chunk_tokens=1000, overlap_tokens=50)
+    assert len(chunks) > 1
+    assert all(summarization.count_tokens(chunk, "gpt-4o-mini") <= 1000 for chunk in chunks)
+
+
+def test_reduce_truncates_partials_too_large_to_pair(characters):
+    calls = []
+
+    def complete(text, model, prompt, on_delta=None):
+        calls.append(len(text))
+        return "x" * 2500  # every answer is as large as the partials it combined
+
+    budget = summarization.input_budget("gpt-4", f"prompt\n\n{summarization.REDUCE_INSTRUCTION}")
+    result = summarization.reduce_partials(["y" * 2500] * 6, "gpt-4", "prompt", complete)
+    assert result == "x" * 2500
+    assert len(calls) <= 6
+    assert all(length <= budget + 10 for length in calls)
+
+
+def test_reduce_refuses_a_window_too_small_to_combine(characters, monkeypatch):
+    monkeypatch.setattr(summarization, "input_budget", lambda model, prompt: 30)
+    with pytest.raises(ValueError, match="too small"):
+        summarization.reduce_partials(["y" * 100] * 3, "gpt-4", "prompt", lambda *args, **kwargs: "never")
+
+
+@pytest.mark.parametrize("model, window", [
+    ("gpt-4o", 128000),
+    ("gpt-4o-mini", 128000),
+    ("gpt-4o-2024-08-06", 128000),
+    ("gpt-4.1-mini", 1047576),
+    ("gpt-4", 8192),
+    ("gpt-4-0613", 8192),
+    ("gpt-4-turbo-2024-04-09", 128000),
+    ("gpt-3.5-turbo-0125", 16385),
+    ("o1-mini", 128000),
+    ("ft:gpt-4o-mini-2024-07-18:acme::abc123", 128000),
+    ("some-local-model", summarization.DEFAULT_CONTEXT_WINDOW),
+])
+def test_context_window_matches_model_families(model, window):
+    assert summarization.context_window(model) == window
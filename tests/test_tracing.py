@@ -0,0 +1,31 @@
+from tracing import Tracer, spans_metrics
+
+
+def run_job(tracer):
+    with tracer.collect() as spans:
+        with tracer.span("read_file", bytes=100):
+            pass
+        try:
+            with tracer.span("read_file", bytes=50):
+                raise ValueError("unreadable")
+        except ValueError:
+            pass
+    return spans_metrics(spans)
+
+
+def test_spans_metrics_matches_tracer_metrics():
+    tracer = Tracer(export_path=None)
+    metrics = run_job(tracer)
+    assert metrics == tracer.metrics()
+    assert metrics["read_file"]["count"] == 2
+    assert metrics["read_file"]["errors"] == 1
+    assert metrics["read_file"]["totals"] == {"bytes": 150}
+
+
+def test_merge_adds_metrics_from_other_processes():
+    parent = Tracer(export_path=None)
+    parent.merge(run_job(Tracer(export_path=None)))
+    parent.merge(run_job(Tracer(export_path=None)))
+    metric = parent.metrics()["read_file"]
+    assert (metric["count"], metric["errors"], metric["totals"]) == (4, 2, {"bytes": 300})
+    assert 'meeting_span_count_total{span="read_file"} 4' in parent.prometheus()
@@ -0,0 +1,59 @@
+import os
+
+from transcription_cache import TranscriptionCache
+
+
+def put_aged(cache, key, text, age):
+    cache.put(key, text)
+    stamp = 1_000_000 - age
+    os.utime(cache._path(key), (stamp, stamp))
+
+
+def test_creating_a_cache_does_not_touch_the_disk(tmp_path):
+    directory = tmp_path / "cache"
+    cache = TranscriptionCache(str(directory))
+    assert cache.get(TranscriptionCache.key(b"audio", "whisper-1", "")) is None
+    assert not directory.exists()
+    assert cache.stats()["size_bytes"] == 0
+
+
+def test_hits_misses_and_saved_bytes_are_counted(tmp_path):
+    cache = TranscriptionCache(str(tmp_path))
+    computed = []
+    for _ in range(2):
+        assert cache.get_or_compute(b"audio bytes", "whisper-1", "", lambda: computed.append(1) or "text") == "text"
+    assert computed == [1]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["bytes_saved"]) == (1, 1, len(b"audio bytes"))
+
+
+def test_least_recently_used_entries_are_evicted_over_budget(tmp_path):
+    keys = [TranscriptionCache.key(bytes([i]), "model", "") for i in range(3)]
+    cache = TranscriptionCache(str(tmp_path), max_bytes=250)
+    put_aged(cache, keys[0], "a" * 100, age=30)
+    put_aged(cache, keys[1], "b" * 100, age=20)
+    cache.get(keys[0])  # touching an entry makes it the most recently used
+    cache.put(keys[2], "c" * 100)
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == "a" * 100
+    assert cache.get(keys[2]) == "c" * 100
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["size_bytes"] == 200
+
+
+def test_existing_entries_count_toward_the_budget(tmp_path):
+    keys = [TranscriptionCache.key(bytes([i]), "model", "") for i in range(2)]
+    put_aged(TranscriptionCache(str(tmp_path)), keys[0], "a" * 100, age=30)
+    cache = TranscriptionCache(str(tmp_path), max_bytes=150)
+    cache.put(keys[1], "b" * 100)
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[1]) == "b" * 100
+
+
+def test_files_are_keyed_like_their_bytes(tmp_path):
+    path = tmp_path / "recording.mp3"
+    path.write_bytes(b"x" * 3_000_000)
+    with open(path, "rb") as f:
+        f.seek(10)
+        assert TranscriptionCache.key(f, "whisper-1", "") == TranscriptionCache.key(b"x" * 3_000_000, "whisper-1", "")
+        assert f.tell() == 10
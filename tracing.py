@@ -0,0 +1,196 @@
+import contextvars
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Append every finished span to this file as one JSON object per line
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH")
+
+# Finished spans kept in memory for inspection
+MAX_RECENT_SPANS = int(os.getenv("MAX_RECENT_SPANS", "2000"))
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+_collectors = contextvars.ContextVar("span_collectors", default=())
+_span_ids = itertools.count(1)
+
+
+class Span:
+    """One timed unit of work with attributes such as file type, bytes, pages, images, tokens and cache hits."""
+
+    def __init__(self, name, parent, attributes):
+        self.name = name
+        self.id = next(_span_ids)
+        self.parent_id = parent.id if parent else None
+        self.trace_id = parent.trace_id if parent else self.id
+        self.attributes = attributes
+        self.start = time.time()
+        self.duration = None
+        self.error = None
+        self._started = time.perf_counter()
+
+    def set(self, **attributes):
+        """Add or overwrite attributes while the span is running."""
+        self.attributes.update(attributes)
+
+    def add(self, name, amount=1):
+        """Increment a numeric attribute."""
+        self.attributes[name] = self.attributes.get(name, 0) + amount
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "id": self.id,
+            "parent_id": self.parent_id,
+            "trace_id": self.trace_id,
+            "start": self.start,
+            "duration": self.duration,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class Tracer:
+    """Records spans and aggregates them into per-stage metrics.
+
+    The current span and any active collectors live in context variables, so
+    work handed to a pool through propagate() is attributed to the span and
+    collector that submitted it.
+    """
+
+    def __init__(self, export_path=TRACE_EXPORT_PATH, max_recent=MAX_RECENT_SPANS):
+        self.export_path = export_path
+        self.recent = deque(maxlen=max_recent)
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """Time the enclosed block as a child of the current span, yielding the Span."""
+        span = Span(name, _current_span.get(), attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current_span.reset(token)
+            span.duration = time.perf_counter() - span._started
+            self._finish(span)
+
+    @contextmanager
+    def collect(self):
+        """Yield a list that receives every span finished in this context, including propagated work."""
+        spans = []
+        token = _collectors.set(_collectors.get() + (spans,))
+        try:
+            yield spans
+        finally:
+            _collectors.reset(token)
+
+    def _finish(self, span):
+        for spans in _collectors.get():
+            spans.append(span)
+        with self._lock:
+            self.recent.append(span)
+            add_span_metrics(self._metrics, span)
+            if self.export_path:
+                with open(self.export_path, "a") as f:
+                    f.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+    def metrics(self):
+        """Return per-span-name counts, errors, total and max seconds and summed numeric attributes."""
+        with self._lock:
+            return {name: dict(metric, totals=dict(metric["totals"])) for name, metric in self._metrics.items()}
+
+    def merge(self, metrics):
+        """Add metrics() gathered elsewhere, e.g. in a worker process, into this tracer's."""
+        with self._lock:
+            merge_metrics(self._metrics, metrics)
+
+    def prometheus(self):
+        """Render metrics() in the Prometheus text exposition format."""
+        lines = [
+            "# TYPE meeting_span_seconds_total counter",
+            "# TYPE meeting_span_count_total counter",
+            "# TYPE meeting_span_errors_total counter",
+            "# TYPE meeting_span_attribute_total counter",
+        ]
+        for name, metric in sorted(self.metrics().items()):
+            lines.append(f'meeting_span_seconds_total{{span="{name}"}} {metric["seconds"]:.6f}')
+            lines.append(f'meeting_span_count_total{{span="{name}"}} {metric["count"]}')
+            lines.append(f'meeting_span_errors_total{{span="{name}"}} {metric["errors"]}')
+            for key, value in sorted(metric["totals"].items()):
+                lines.append(f'meeting_span_attribute_total{{span="{name}",attribute="{key}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+
+def empty_metric():
+    return {"count": 0, "errors": 0, "seconds": 0.0, "max_seconds": 0.0, "totals": {}}
+
+
+def add_span_metrics(metrics, span):
+    """Add one finished span to a {span name: metric} dict in the shape of Tracer.metrics()."""
+    metric = metrics.setdefault(span.name, empty_metric())
+    metric["count"] += 1
+    metric["errors"] += span.error is not None
+    metric["seconds"] += span.duration
+    metric["max_seconds"] = max(metric["max_seconds"], span.duration)
+    for key, value in span.attributes.items():
+        if isinstance(value, (int, float)):
+            metric["totals"][key] = metric["totals"].get(key, 0) + value
+
+
+def merge_metrics(metrics, other):
+    """Add the metrics in other into metrics, both in the shape of Tracer.metrics()."""
+    for name, source in other.items():
+        metric = metrics.setdefault(name, empty_metric())
+        for key in ("count", "errors", "seconds"):
+            metric[key] += source[key]
+        metric["max_seconds"] = max(metric["max_seconds"], source["max_seconds"])
+        for key, value in source["totals"].items():
+            metric["totals"][key] = metric["totals"].get(key, 0) + value
+
+
+def spans_metrics(spans):
+    """Aggregate collected spans in the shape of Tracer.metrics()."""
+    metrics = {}
+    for span in spans:
+        add_span_metrics(metrics, span)
+    return metrics
+
+
+def propagate(function):
+    """Bind function to the current context, so spans it opens on a pool thread keep their parent and collectors."""
+    context = contextvars.copy_context()
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        # Each call gets its own copy, since one context cannot be entered by two threads at once
+        return context.copy().run(function, *args, **kwargs)
+    return wrapper
+
+
+def summarize_spans(spans):
+    """Aggregate collected spans by name into rows of count, total seconds, max seconds and numeric attribute totals."""
+    rows = {}
+    for span in spans:
+        row = rows.setdefault(span.name, {"stage": span.name, "count": 0, "errors": 0, "seconds": 0.0, "max_seconds": 0.0})
+        row["count"] += 1
+        row["errors"] += span.error is not None
+        row["seconds"] += span.duration
+        row["max_seconds"] = max(row["max_seconds"], span.duration)
+        for key, value in span.attributes.items():
+            if isinstance(value, (int, float)):
+                row[key] = row.get(key, 0) + value
+    return sorted(rows.values(), key=lambda row: row["seconds"], reverse=True)
+
+
+# One tracer for the whole process
+tracer = Tracer()
+span = tracer.span
@@ -0,0 +1,159 @@
+import hashlib
+import os
+import tempfile
+import threading
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "meeting-summarizer")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Files on disk are hashed in blocks of this size rather than read whole
+HASH_BLOCK_BYTES = 1024 * 1024
+
+
+def update_from_file(digest, file):
+    """Feed a seekable binary file's whole content to a hashlib digest, block by block, keeping its position."""
+    position = file.tell()
+    file.seek(0)
+    for block in iter(lambda: file.read(HASH_BLOCK_BYTES), b""):
+        digest.update(block)
+    file.seek(position)
+
+
+def content_size(data):
+    """Return the size of bytes-like data or of a seekable binary file."""
+    if not hasattr(data, "read"):
+        return memoryview(data).nbytes
+    position = data.tell()
+    size = data.seek(0, os.SEEK_END)
+    data.seek(position)
+    return size
+
+
+class TranscriptionCache:
+    """Content-addressed on-disk cache of transcriptions with size-bounded LRU eviction.
+
+    Entries are keyed by a hash of the input bytes plus the model and prompt
+    that produced them, so identical uploads are only transcribed once no
+    matter who uploads them. Recency is tracked through file mtimes, which
+    lets several processes share one cache directory. Nothing touches the
+    disk until the first put, so creating a cache is free.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._size = None  # measured on first put
+
+    def _prepare(self):
+        """Create the directory and measure the entries already in it, once."""
+        with self._lock:
+            if self._size is None:
+                os.makedirs(self.directory, exist_ok=True)
+                self._size = sum(os.path.getsize(path) for path in self._entry_paths())
+
+    @staticmethod
+    def key(data, model, prompt):
+        """Return the cache key for input transcribed with a model and prompt.
+
+        data is bytes-like, or a seekable binary file, which is hashed by streaming.
+        """
+        digest = hashlib.sha256()
+        if hasattr(data, "read"):
+            update_from_file(digest, data)
+        else:
+            digest.update(data)
+        digest.update(b"\0" + model.encode() + b"\0" + prompt.encode())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".txt")
+
+    def _entry_paths(self):
+        # Only this cache's own <xx>/<key>.txt layout, so caches nested inside it are left alone
+        for prefix in os.listdir(self.directory):
+            shard = os.path.join(self.directory, prefix)
+            if len(prefix) != 2 or not os.path.isdir(shard):
+                continue
+            for name in os.listdir(shard):
+                if name.startswith(prefix) and name.endswith(".txt") and len(name) == 68:
+                    yield os.path.join(shard, name)
+
+    def get(self, key):
+        """Return the cached text for a key, or None."""
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return text
+
+    def put(self, key, text):
+        """Store text under a key, evicting least recently used entries if over budget."""
+        self._prepare()
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(temp_path, path)
+        with self._lock:
+            self._size += os.path.getsize(path)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        entries = []
+        for path in self._entry_paths():
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if self._size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self._size -= size
+            self.evictions += 1
+
+    def get_or_compute(self, data, model, prompt, compute):
+        """Return the cached result for data, calling compute() and storing it on a miss."""
+        key = self.key(data, model, prompt)
+        cached = self.get(key)
+        with self._lock:
+            if cached is not None:
+                self.hits += 1
+                self.bytes_saved += content_size(data)
+                return cached
+            self.misses += 1
+        result = compute()
+        if result is not None:
+            self.put(key, result)
+        return result
+
+    def stats(self):
+        """Return hit, miss, eviction and size statistics."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "bytes_saved": self.bytes_saved,
+                "evictions": self.evictions,
+                "size_bytes": self._size or 0,
+            }